@@ -16,15 +16,23 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import os
 
 from util.windows import smbcreds
 from .samba_backend import samba_backend
 from .nodomain_backend import nodomain_backend
 from util.logging import log
+from util.timings import timed
 from util.config import GPConfig
 from util.util import get_uid_by_username, touch_file
-from util.paths import get_dconf_config_file
+from util.paths import get_dconf_config_file, get_dconf_config_path, get_dconf_db_file
 from storage.dconf_registry import Dconf_registry, create_dconf_ini_file, add_preferences_to_global_registry_dict
+from storage.dconf_db import (
+      dconf_db_changed
+    , read_dconf_locks
+    , replace_dconf_db
+    , serialize_dconf_db
+)
 
 def backend_factory(dc, username, is_machine, no_domain = False):
     '''
@@ -42,8 +50,9 @@ def backend_factory(dc, username, is_machine, no_domain = False):
             if dc:
                 ld = dict({'dc': dc})
                 log('D52', ld)
-        sc = smbcreds(dc)
-        domain = sc.get_domain()
+        with timed('dc_discovery'):
+            sc = smbcreds(dc)
+            domain = sc.get_domain()
         ldata = dict({'domain': domain, "username": username, 'is_machine': is_machine})
         log('D9', ldata)
         try:
@@ -68,7 +77,23 @@ def save_dconf(username, is_machine):
     else:
         uid = get_uid_by_username(username) if not is_machine else None
     target_file = get_dconf_config_file(uid)
-    touch_file(target_file)
+    db_file = get_dconf_db_file(uid)
     Dconf_registry.apply_template(uid)
     add_preferences_to_global_registry_dict(username, is_machine)
-    create_dconf_ini_file(target_file,Dconf_registry.global_registry_dict, uid)
+    logdata = dict()
+    logdata['path'] = db_file
+    try:
+        locks = read_dconf_locks(get_dconf_config_path(uid))
+        contents = serialize_dconf_db(Dconf_registry.global_registry_dict, locks)
+        if dconf_db_changed(db_file, contents) or not os.path.exists(target_file):
+            # Keyfile must match the database because "dconf update"
+            # rebuilds the database out of the keyfile directory
+            touch_file(target_file)
+            create_dconf_ini_file(target_file, Dconf_registry.global_registry_dict, uid)
+            replace_dconf_db(db_file, contents)
+            log('D206', logdata)
+        else:
+            log('D213', logdata)
+    except Exception as exc:
+        logdata['exc'] = exc
+        log('E71', logdata)
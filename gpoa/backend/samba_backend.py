@@ -25,7 +25,7 @@ except ImportError:
 
 from .applier_backend import applier_backend
 from storage import registry_factory
-from gpt.gpt import gpt, get_local_gpt
+from gpt.gpt import gpt, get_local_gpt, parse_gpts
 from gpt.gpo_dconf_mapping import GpoInfoDconf
 from util.util import (
     get_machine_name,
@@ -36,8 +36,10 @@ from util.kerberos import (
     , machine_kdestroy
 )
 from util.sid import get_sid
+from util.config import GPConfig
 import util.preg
 from util.logging import log
+from util.timings import timed
 
 class samba_backend(applier_backend):
     __user_policy_mode_key = '/SOFTWARE/Policies/Microsoft/Windows/System/UserPolicyMode'
@@ -45,9 +47,13 @@ class samba_backend(applier_backend):
 
     def __init__(self, sambacreds, username, domain, is_machine):
         self.cache_path = '/var/cache/gpupdate/creds/krb5cc_{}'.format(os.getpid())
-        self.__kinit_successful = machine_kinit(self.cache_path)
-        if not self.__kinit_successful:
-            raise Exception('kinit is not successful')
+        self.__kinit_successful = False
+        # GPTs are taken from the cache when domain controllers are
+        # unreachable, so there is no reason to wait for KDC timeouts
+        if not sambacreds.offline:
+            self.__kinit_successful = machine_kinit(self.cache_path)
+            if not self.__kinit_successful:
+                raise Exception('kinit is not successful')
         self.storage = registry_factory()
         self.storage.set_info('domain', domain)
         machine_name = get_machine_name()
@@ -67,6 +73,7 @@ class samba_backend(applier_backend):
         self.sambacreds = sambacreds
 
         self.cache_dir = self.sambacreds.get_cache_dir()
+        self.parse_workers = GPConfig().get_parse_workers()
         self.gpo_cache_part ='gpo_cache'
         self._cached = False
         self.storage.set_info('cache_dir', os.path.join(self.cache_dir, self.gpo_cache_part))
@@ -108,13 +115,7 @@ class samba_backend(applier_backend):
             raise exc
 
         if self._is_machine_username:
-            for gptobj in machine_gpts:
-                try:
-                    gptobj.merge_machine()
-                except Exception as exc:
-                    logdata = dict()
-                    logdata['msg'] = str(exc)
-                    log('E26', logdata)
+            self._merge_gpts(machine_gpts, 'machine', 'E26')
 
         # Load user GPT values in case user's name specified
         # This is a buggy implementation and should be tested more
@@ -133,23 +134,29 @@ class samba_backend(applier_backend):
             log('D152', logdata)
 
             if policy_mode < 2:
-                for gptobj in user_gpts:
-                    try:
-                        gptobj.merge_user()
-                    except Exception as exc:
-                        logdata = dict()
-                        logdata['msg'] = str(exc)
-                        log('E27', logdata)
+                self._merge_gpts(user_gpts, 'user', 'E27')
 
             if policy_mode > 0:
                 for gptobj in machine_gpts:
-                    try:
-                        gptobj.sid = self.sid
-                        gptobj.merge_user()
-                    except Exception as exc:
-                        logdata = dict()
-                        logdata['msg'] = str(exc)
-                        log('E63', logdata)
+                    gptobj.sid = self.sid
+                self._merge_gpts(machine_gpts, 'user', 'E63')
+
+    def _merge_gpts(self, gpts, part, error_code):
+        '''
+        Parse GPTs in parallel and merge them one by one in the order
+        of GPO links so policy precedence is preserved.
+        '''
+        for gptobj, parsed in zip(gpts, parse_gpts(gpts, part, self.parse_workers)):
+            try:
+                with timed('gpt_merge_{}'.format(part), gptobj.name):
+                    if part == 'machine':
+                        gptobj.merge_machine(parsed)
+                    else:
+                        gptobj.merge_user(parsed)
+            except Exception as exc:
+                logdata = dict()
+                logdata['msg'] = str(exc)
+                log(error_code, logdata)
 
     def _check_sysvol_present(self, gpo):
         '''
@@ -174,7 +181,8 @@ class samba_backend(applier_backend):
 
         log('D45', {'username': username, 'sid': sid})
         # util.windows.smbcreds
-        gpos = self.sambacreds.update_gpos(username)
+        with timed('update_gpos', username):
+            gpos = self.sambacreds.update_gpos(username)
         log('D46')
         for gpo in gpos:
             if self._check_sysvol_present(gpo):
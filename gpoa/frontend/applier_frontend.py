@@ -17,63 +17,116 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from abc import ABC
+from types import MappingProxyType
 
 from util.logging import log
 
-def check_experimental_enabled(storage):
-    experimental_enable_flag = '/Software/BaseALT/Policies/GPUpdate/GlobalExperimental'
-    flag = storage.get_key_value(experimental_enable_flag)
+class gpupdate_flags:
+    '''
+    Immutable snapshot of Software/BaseALT/Policies/GPUpdate branch
+    which holds switches for GPOA modules. The branch is read once
+    and all module checks are answered from memory.
+    '''
+    __gpupdate_branch = '/Software/BaseALT/Policies/GPUpdate/'
+
+    def __init__(self, storage):
+        flags = dict()
+        keys = storage.get_matching_keys(self.__gpupdate_branch)
+        for key, value in storage.get_key_values(keys or list()).items():
+            flags[key.rpartition('/')[2]] = value
+        self.__flags = MappingProxyType(flags)
+
+    def get(self, name):
+        return self.__flags.get(name)
+
+    def experimental_enabled(self):
+        flag = self.get('GlobalExperimental')
 
-    result = False
+        result = False
+
+        if flag and '1' == str(flag):
+            result = True
+
+        return result
+
+    def windows_mapping_enabled(self):
+        flag = str(self.get('WindowsPoliciesMapping'))
 
-    if flag and '1' == str(flag):
         result = True
 
-    return result
+        if flag and '0' == flag:
+            result = False
 
-def check_windows_mapping_enabled(storage):
-    windows_mapping_enable_flag = '/Software/BaseALT/Policies/GPUpdate/WindowsPoliciesMapping'
-    flag = storage.get_key_value(windows_mapping_enable_flag)
+        return result
 
-    result = True
-    flag = str(flag)
-    if flag and '0' == flag:
-        result = False
+    def module_enabled(self, module_name):
+        flag = str(self.get(module_name))
 
-    return result
+        result = None
 
-def check_module_enabled(storage, module_name):
-    gpupdate_module_enable_branch = '/Software/BaseALT/Policies/GPUpdate'
-    gpupdate_module_flag = '{}/{}'.format(gpupdate_module_enable_branch, module_name)
-    flag = storage.get_key_value(gpupdate_module_flag)
-
-    result = None
-    flag = str(flag)
-    if flag and flag!='None':
-        if '1' == flag:
-            result =  True
-        else:
-            result =  False
+        if flag and flag != 'None':
+            if '1' == flag:
+                result = True
+            else:
+                result = False
 
-    return result
+        return result
 
-def check_enabled(storage, module_name, is_experimental):
-    module_enabled = check_module_enabled(storage, module_name)
-    exp_enabled = check_experimental_enabled(storage)
+    def enabled(self, module_name, is_experimental):
+        module_enabled = self.module_enabled(module_name)
+        exp_enabled = self.experimental_enabled()
 
-    result = False
+        result = False
 
-    if None == module_enabled:
-        if is_experimental and exp_enabled:
-            result = True
-        if not is_experimental:
-            result = True
-    else:
-        result = module_enabled
+        if None == module_enabled:
+            if is_experimental and exp_enabled:
+                result = True
+            if not is_experimental:
+                result = True
+        else:
+            result = module_enabled
+
+        return result
+
+def get_gpupdate_flags(storage):
+    '''
+    Get module switches snapshot shared by all appliers. Frontend
+    manager publishes the snapshot before creating appliers so it is
+    built here only when appliers are used on their own.
+    '''
+    flags = storage.get_info('gpupdate_flags')
+    if flags is None:
+        flags = gpupdate_flags(storage)
+        storage.set_info('gpupdate_flags', flags)
+    return flags
 
-    return result
+def check_experimental_enabled(storage):
+    return get_gpupdate_flags(storage).experimental_enabled()
+
+def check_windows_mapping_enabled(storage):
+    return get_gpupdate_flags(storage).windows_mapping_enabled()
+
+def check_module_enabled(storage, module_name):
+    return get_gpupdate_flags(storage).module_enabled(module_name)
+
+def check_enabled(storage, module_name, is_experimental):
+    return get_gpupdate_flags(storage).enabled(module_name, is_experimental)
+
+class applier_inputs:
+    '''
+    Description of the data consumed by applier: registry branches,
+    preference types (names of the storage lists) and files produced
+    by applier which are checked for modifications made outside of
+    gpupdate. Appliers without inputs are run every time.
+    '''
+    def __init__(self, branches=(), preferences=(), outputs=()):
+        self.branches = tuple(branches)
+        self.preferences = tuple(preferences)
+        self.outputs = tuple(outputs)
 
 class applier_frontend(ABC):
+    inputs = None
+
     @classmethod
     def __init__(self, regobj):
         pass
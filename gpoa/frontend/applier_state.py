@@ -0,0 +1,145 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2019-2024 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+import json
+import os
+import time
+
+from storage.dconf_registry import serialize_preference
+from util.paths import applier_state_file
+from util.logging import log
+
+
+# Must be incremented every time fingerprints are computed differently
+_state_format = 1
+# GPUpdate switches may change the behaviour of any applier
+_common_branches = ('Software/BaseALT/Policies/GPUpdate',)
+
+
+def _outputs_state(path):
+    '''
+    Size and modification time of the file or of every file in the
+    directory.
+    '''
+    try:
+        if os.path.isdir(path):
+            return sorted((entry.name, entry.stat().st_size, entry.stat().st_mtime_ns)
+                          for entry in os.scandir(path))
+        stat = os.stat(path)
+        return [stat.st_size, stat.st_mtime_ns]
+    except OSError:
+        return None
+
+
+class applier_state:
+    '''
+    Fingerprints of applier inputs (registry branches and preferences)
+    and outputs saved after the successful run. Applier whose
+    fingerprints are the same as on the previous run has nothing to
+    change and is skipped. All appliers are run when forced and when
+    the last full run is older than full_apply_interval hours.
+    '''
+    def __init__(self, storage, username=None, full_apply_interval=24, force=False):
+        self.storage = storage
+        self.path = applier_state_file(username)
+        self.saved = dict()
+        self.appliers = dict()
+        self.last_full_apply = 0
+        self.load()
+
+        self.now = time.time()
+        self.full_apply = (force
+            or not full_apply_interval
+            or self.now - self.last_full_apply >= full_apply_interval * 3600)
+        if self.full_apply:
+            log('D218')
+        else:
+            self.appliers.update(self.saved)
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            if data['format'] == _state_format:
+                self.saved = dict(data['appliers'])
+                self.last_full_apply = float(data['full_apply'])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    def save(self):
+        data = dict()
+        data['format'] = _state_format
+        data['full_apply'] = self.now if self.full_apply else self.last_full_apply
+        data['appliers'] = self.appliers
+        tmp_file = '{}.tmp'.format(self.path)
+        try:
+            with open(tmp_file, 'w') as f:
+                json.dump(data, f)
+            os.rename(tmp_file, self.path)
+        except OSError as exc:
+            logdata = dict({'path': self.path, 'exc': exc})
+            log('W26', logdata)
+
+    def fingerprint(self, inputs):
+        digest = hashlib.sha1()
+        for branch in _common_branches + inputs.branches:
+            entries = self.storage.filter_entries(branch)
+            digest.update(json.dumps(entries, sort_keys=True, default=str).encode('utf-8'))
+        for preference_type in inputs.preferences:
+            for preference in getattr(self.storage, preference_type):
+                digest.update(serialize_preference(preference)[1].encode('utf-8'))
+        inputs_fingerprint = digest.hexdigest()
+
+        outputs = [_outputs_state(path) for path in inputs.outputs]
+        outputs_fingerprint = hashlib.sha1(json.dumps(outputs).encode('utf-8')).hexdigest()
+
+        return [inputs_fingerprint, outputs_fingerprint]
+
+    def is_unchanged(self, applier_name, inputs):
+        '''
+        Check if applier inputs and outputs are the same as after the
+        previous successful run.
+        '''
+        if self.full_apply or inputs is None:
+            return False
+        saved = self.saved.get(applier_name)
+        return saved is not None and saved == self.fingerprint(inputs)
+
+    def update(self, applier_name, inputs):
+        '''
+        Save fingerprints after the successful run of applier.
+        '''
+        if inputs is None:
+            return
+        self.appliers[applier_name] = self.fingerprint(inputs)
+
+    def forget(self, applier_name):
+        '''
+        Drop fingerprints of applier so it is run next time.
+        '''
+        self.appliers.pop(applier_name, None)
+
+    def retain(self, applier_names):
+        '''
+        Drop fingerprints of appliers which were not created (e.g.
+        switched off) so they are run when created again.
+        '''
+        for applier_name in list(self.appliers):
+            if applier_name not in applier_names:
+                del self.appliers[applier_name]
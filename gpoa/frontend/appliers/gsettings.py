@@ -72,13 +72,13 @@ class system_gsettings:
         config = configparser.ConfigParser()
 
         for gsetting in self.gsettings:
-            logdata = dict()
-            logdata['gsetting.schema'] = gsetting.schema
-            logdata['gsetting.path'] = gsetting.path
-            logdata['gsetting.value'] = gsetting.value
-            logdata['gsetting.lock'] = gsetting.lock
             settings = Gio.Settings(schema=gsetting.schema)
-            log('D89', logdata)
+            log('D89', lambda: dict({
+                  'gsetting.schema': gsetting.schema
+                , 'gsetting.path': gsetting.path
+                , 'gsetting.value': gsetting.value
+                , 'gsetting.lock': gsetting.lock
+            }))
             gsetting.apply(settings, config, self.locks)
 
         with open(self.override_file_path, 'w') as f:
@@ -146,11 +146,11 @@ class user_gsettings:
 
     def apply(self):
         for gsetting in self.gsettings:
-            logdata = dict()
-            logdata['gsetting.schema'] = gsetting.schema
-            logdata['gsetting.path'] = gsetting.path
-            logdata['gsetting.value'] = gsetting.value
-            log('D85', logdata)
+            log('D85', lambda: dict({
+                  'gsetting.schema': gsetting.schema
+                , 'gsetting.path': gsetting.path
+                , 'gsetting.value': gsetting.value
+            }))
             gsetting.apply()
 
 
@@ -18,6 +18,7 @@
 
 from .applier_frontend import (
       applier_frontend
+    , applier_inputs
     , check_enabled
 )
 from .appliers.control import control
@@ -30,6 +31,7 @@ class control_applier(applier_frontend):
     __module_experimental = False
     __module_enabled = True
     _registry_branch = 'Software/BaseALT/Policies/Control'
+    inputs = applier_inputs(branches=[_registry_branch])
 
     def __init__(self, storage):
         self.storage = storage
@@ -24,6 +24,7 @@ import cups
 
 from .applier_frontend import (
       applier_frontend
+    , applier_inputs
     , check_enabled
 )
 from gpt.printers import json2printer
@@ -68,6 +69,7 @@ class cups_applier(applier_frontend):
     __module_name = 'CUPSApplier'
     __module_experimental = True
     __module_enabled = False
+    inputs = applier_inputs(preferences=['printers'])
 
     def __init__(self, storage):
         self.storage = storage
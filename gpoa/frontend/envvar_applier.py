@@ -18,6 +18,7 @@
 
 from .applier_frontend import (
       applier_frontend
+    , applier_inputs
     , check_enabled
 )
 from .appliers.envvar import Envvar
@@ -29,6 +30,10 @@ class envvar_applier(applier_frontend):
     __module_name = 'EnvvarsApplier'
     __module_experimental = False
     __module_enabled = True
+    inputs = applier_inputs(
+          preferences=['environmentvariables']
+        , outputs=['/etc/gpupdate/environment']
+    )
 
     def __init__(self, storage, sid):
         self.storage = storage
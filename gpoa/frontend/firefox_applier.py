@@ -30,6 +30,7 @@ import os
 
 from .applier_frontend import (
       applier_frontend
+    , applier_inputs
     , check_enabled
 )
 from util.logging import log
@@ -42,6 +43,13 @@ class firefox_applier(applier_frontend):
     __registry_branch = 'Software/Policies/Mozilla/Firefox'
     __firefox_installdir1 = '/usr/lib64/firefox/distribution'
     __firefox_installdir2 = '/etc/firefox/policies'
+    inputs = applier_inputs(
+          branches=[__registry_branch]
+        , outputs=[
+              '{}/policies.json'.format(__firefox_installdir1)
+            , '{}/policies.json'.format(__firefox_installdir2)
+        ]
+    )
 
     def __init__(self, storage, sid, username):
         self.storage = storage
@@ -23,6 +23,7 @@ import subprocess
 from util.logging import slogm, log
 from .applier_frontend import (
       applier_frontend
+    , applier_inputs
     , check_enabled
 )
 from .appliers.firewall_rule import FirewallRule
@@ -34,6 +35,7 @@ class firewall_applier(applier_frontend):
     __firewall_branch = 'SOFTWARE\\Policies\\Microsoft\\WindowsFirewall\\FirewallRules'
     __firewall_switch = 'SOFTWARE\\Policies\\Microsoft\\WindowsFirewall\\DomainProfile\\EnableFirewall'
     __firewall_reset_cmd = ['/usr/bin/alterator-net-iptables', 'reset']
+    inputs = applier_inputs(branches=[__firewall_branch, __firewall_switch])
 
     def __init__(self, storage):
         self.storage = storage
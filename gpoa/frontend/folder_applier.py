@@ -20,6 +20,7 @@ from pathlib import Path
 
 from .applier_frontend import (
       applier_frontend
+    , applier_inputs
     , check_enabled
 )
 from .appliers.folder import Folder
@@ -31,6 +32,7 @@ class folder_applier(applier_frontend):
     __module_name = 'FoldersApplier'
     __module_experimental = False
     __module_enabled = True
+    inputs = applier_inputs(preferences=['folders'])
 
     def __init__(self, storage, sid):
         self.storage = storage
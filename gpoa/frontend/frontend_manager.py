@@ -16,65 +16,13 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from storage import registry_factory
-from storage.fs_file_cache import fs_file_cache
-
-from .control_applier import control_applier
-from .polkit_applier import (
-      polkit_applier
-    , polkit_applier_user
-)
-from .systemd_applier import systemd_applier
-from .firefox_applier import firefox_applier
-from .chromium_applier import chromium_applier
-from .cups_applier import cups_applier
-from .package_applier import (
-      package_applier
-    , package_applier_user
-)
-from .shortcut_applier import (
-    shortcut_applier,
-    shortcut_applier_user
-)
-from .gsettings_applier import (
-    gsettings_applier,
-    gsettings_applier_user
-)
-from .firewall_applier import firewall_applier
-from .folder_applier import (
-      folder_applier
-    , folder_applier_user
-)
-from .cifs_applier import (
-      cifs_applier_user
-    , cifs_applier)
-from .ntp_applier import ntp_applier
-from .envvar_applier import (
-      envvar_applier
-    , envvar_applier_user
-)
-from .scripts_applier import (
-      scripts_applier
-    , scripts_applier_user
-)
+import concurrent.futures
+import importlib
 
-from .file_applier import (
-      file_applier
-    , file_applier_user
-)
-
-from .ini_applier import (
-      ini_applier
-    , ini_applier_user
-)
-
-from .kde_applier import (
-      kde_applier
-    , kde_applier_user
-)
+from storage import registry_factory
 
-from .networkshare_applier import networkshare_applier
-from .yandex_browser_applier import yandex_browser_applier
+from .applier_frontend import gpupdate_flags
+from .applier_state import applier_state
 
 from util.sid import get_sid
 from util.users import (
@@ -82,9 +30,127 @@ from util.users import (
     get_process_user,
     username_match_uid,
 )
-from util.logging import log
+from util.logging import log, error_count
 from util.system import with_privileges
+from util.config import GPConfig
+from util.timings import timed
+
 
+class applier_descriptor:
+    '''
+    Reference to applier class which is imported on the first call.
+    Calling descriptor creates applier object.
+    '''
+    def __init__(self, module_name, class_name):
+        self.module_name = module_name
+        self.class_name = class_name
+        self.applier_class = None
+
+    def load(self):
+        if self.applier_class is None:
+            module = importlib.import_module(self.module_name, __package__)
+            self.applier_class = getattr(module, self.class_name)
+        return self.applier_class
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+# Applier modules pull in heavy dependencies (jinja2, GLib, cups, dbus,
+# smbc) so they are imported only when the applier is created.
+control_applier        = applier_descriptor('.control_applier', 'control_applier')
+polkit_applier         = applier_descriptor('.polkit_applier', 'polkit_applier')
+polkit_applier_user    = applier_descriptor('.polkit_applier', 'polkit_applier_user')
+systemd_applier        = applier_descriptor('.systemd_applier', 'systemd_applier')
+firefox_applier        = applier_descriptor('.firefox_applier', 'firefox_applier')
+chromium_applier       = applier_descriptor('.chromium_applier', 'chromium_applier')
+cups_applier           = applier_descriptor('.cups_applier', 'cups_applier')
+package_applier        = applier_descriptor('.package_applier', 'package_applier')
+package_applier_user   = applier_descriptor('.package_applier', 'package_applier_user')
+shortcut_applier       = applier_descriptor('.shortcut_applier', 'shortcut_applier')
+shortcut_applier_user  = applier_descriptor('.shortcut_applier', 'shortcut_applier_user')
+gsettings_applier      = applier_descriptor('.gsettings_applier', 'gsettings_applier')
+gsettings_applier_user = applier_descriptor('.gsettings_applier', 'gsettings_applier_user')
+firewall_applier       = applier_descriptor('.firewall_applier', 'firewall_applier')
+folder_applier         = applier_descriptor('.folder_applier', 'folder_applier')
+folder_applier_user    = applier_descriptor('.folder_applier', 'folder_applier_user')
+cifs_applier_user      = applier_descriptor('.cifs_applier', 'cifs_applier_user')
+cifs_applier           = applier_descriptor('.cifs_applier', 'cifs_applier')
+ntp_applier            = applier_descriptor('.ntp_applier', 'ntp_applier')
+envvar_applier         = applier_descriptor('.envvar_applier', 'envvar_applier')
+envvar_applier_user    = applier_descriptor('.envvar_applier', 'envvar_applier_user')
+scripts_applier        = applier_descriptor('.scripts_applier', 'scripts_applier')
+scripts_applier_user   = applier_descriptor('.scripts_applier', 'scripts_applier_user')
+file_applier           = applier_descriptor('.file_applier', 'file_applier')
+file_applier_user      = applier_descriptor('.file_applier', 'file_applier_user')
+ini_applier            = applier_descriptor('.ini_applier', 'ini_applier')
+ini_applier_user       = applier_descriptor('.ini_applier', 'ini_applier_user')
+kde_applier            = applier_descriptor('.kde_applier', 'kde_applier')
+kde_applier_user       = applier_descriptor('.kde_applier', 'kde_applier_user')
+networkshare_applier   = applier_descriptor('.networkshare_applier', 'networkshare_applier')
+yandex_browser_applier = applier_descriptor('.yandex_browser_applier', 'yandex_browser_applier')
+
+
+# Appliers which must be finished before the applier is started.
+# Appliers using the file cache (shared SMB context) are serialized.
+# Dependencies on 'package' hold only when packages are installed
+# synchronously, see machine_apply().
+_machine_applier_dependencies = {
+      'systemd': ('control', 'package')
+    , 'files': ('folders',)
+    , 'ini': ('folders', 'files')
+    , 'shortcuts': ('folders', 'files', 'package')
+    , 'gsettings': ('files', 'package')
+    , 'cups': ('package',)
+    , 'kde': ('package',)
+}
+
+_user_applier_dependencies = {
+      'files': ('folders',)
+    , 'ini': ('folders', 'files')
+    , 'shortcuts': ('folders', 'files')
+    , 'gsettings': ('files',)
+    , 'kde': ('gsettings',)
+}
+
+
+def run_appliers(appliers, run_applier, dependencies, workers):
+    '''
+    Run appliers in the pool of threads. Applier is started when all
+    appliers it depends on are finished, appliers without dependencies
+    between them run concurrently. With one worker appliers are run
+    one by one in the order of the dictionary. run_applier must handle
+    errors of the applier itself.
+    '''
+    if workers <= 1 or len(appliers) < 2:
+        for applier_name, applier_object in appliers.items():
+            run_applier(applier_name, applier_object)
+        return
+
+    waiting = dict()
+    for applier_name in appliers:
+        waiting[applier_name] = set(required for required in dependencies.get(applier_name, ())
+                                    if required in appliers)
+
+    running = dict()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        while waiting or running:
+            for applier_name, required in list(waiting.items()):
+                if not required:
+                    del waiting[applier_name]
+                    future = executor.submit(run_applier, applier_name, appliers[applier_name])
+                    running[future] = applier_name
+            if not running:
+                # Dependency loop, run the rest in order
+                for applier_name in waiting:
+                    run_applier(applier_name, appliers[applier_name])
+                return
+            done, _ = concurrent.futures.wait(running,
+                return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                finished = running.pop(future)
+                future.result()
+                for required in waiting.values():
+                    required.discard(finished)
 
 def determine_username(username=None):
     '''
@@ -133,7 +199,11 @@ class frontend_manager:
         self.is_machine = is_machine
         self.process_uname = get_process_user()
         self.sid = get_sid(self.storage.get_info('domain'), self.username, is_machine)
-        self.file_cache = fs_file_cache('file_cache', self.username)
+        self.__file_cache = None
+
+        self.flags = gpupdate_flags(self.storage)
+        self.storage.set_info('gpupdate_flags', self.flags)
+        self.config = GPConfig()
 
         self.machine_appliers = dict()
         self.user_appliers = dict()
@@ -142,55 +212,110 @@ class frontend_manager:
         else:
             self._init_user_appliers()
 
-    def _init_machine_appliers(self):
-        self.machine_appliers['control'] = control_applier(self.storage)
-        self.machine_appliers['polkit'] = polkit_applier(self.storage)
-        self.machine_appliers['systemd'] = systemd_applier(self.storage)
-        self.machine_appliers['firefox'] = firefox_applier(self.storage, self.sid, self.username)
-        self.machine_appliers['chromium'] = chromium_applier(self.storage, self.sid, self.username)
-        self.machine_appliers['yandex_browser'] = yandex_browser_applier(self.storage, self.sid, self.username)
-        self.machine_appliers['shortcuts'] = shortcut_applier(self.storage)
-        self.machine_appliers['gsettings'] = gsettings_applier(self.storage, self.file_cache)
+    @property
+    def file_cache(self):
+        '''
+        File cache is created only for appliers which need it because
+        it imports smbc and opens SMB context.
+        '''
+        if self.__file_cache is None:
+            from storage.fs_file_cache import fs_file_cache
+            self.__file_cache = fs_file_cache('file_cache', self.username)
+        return self.__file_cache
+
+    def _add_applier(self, appliers, applier_name, module_name, is_experimental, constructor, error_code):
+        '''
+        Create applier only if its module is enabled by GPUpdate
+        switches. Module name set to None means that applier can't be
+        switched off.
+        '''
+        if module_name and not self.flags.enabled(module_name, is_experimental):
+            log('D212', {'applier_name': applier_name, 'module_name': module_name})
+            return
         try:
-            self.machine_appliers['cifs'] = cifs_applier(self.storage, self.sid)
+            with timed('applier_init', applier_name):
+                appliers[applier_name] = constructor()
         except Exception as exc:
             logdata = dict()
-            logdata['applier_name'] = 'cifs'
+            logdata['applier_name'] = applier_name
             logdata['msg'] = str(exc)
-            log('E24', logdata)
-        self.machine_appliers['cups'] = cups_applier(self.storage)
-        self.machine_appliers['firewall'] = firewall_applier(self.storage)
-        self.machine_appliers['folders'] = folder_applier(self.storage, self.sid)
-        self.machine_appliers['package'] = package_applier(self.storage)
-        self.machine_appliers['ntp'] = ntp_applier(self.storage)
-        self.machine_appliers['envvar'] = envvar_applier(self.storage, self.sid)
-        self.machine_appliers['networkshare'] = networkshare_applier(self.storage, self.sid)
-        self.machine_appliers['scripts'] = scripts_applier(self.storage, self.sid)
-        self.machine_appliers['files'] = file_applier(self.storage, self.file_cache, self.sid)
-        self.machine_appliers['ini'] = ini_applier(self.storage, self.sid)
-        self.machine_appliers['kde'] = kde_applier(self.storage)
+            log(error_code, logdata)
+
+    def _add_machine_applier(self, applier_name, module_name, is_experimental, constructor):
+        self._add_applier(self.machine_appliers, applier_name, module_name, is_experimental, constructor, 'E24')
+
+    def _add_user_applier(self, applier_name, module_name, is_experimental, constructor):
+        self._add_applier(self.user_appliers, applier_name, module_name, is_experimental, constructor, 'E25')
+
+    def _init_machine_appliers(self):
+        self._add_machine_applier('control', 'ControlApplier', False,
+            lambda: control_applier(self.storage))
+        self._add_machine_applier('polkit', 'PolkitApplier', False,
+            lambda: polkit_applier(self.storage))
+        self._add_machine_applier('systemd', 'SystemdApplier', False,
+            lambda: systemd_applier(self.storage))
+        self._add_machine_applier('firefox', 'FirefoxApplier', False,
+            lambda: firefox_applier(self.storage, self.sid, self.username))
+        self._add_machine_applier('chromium', 'ChromiumApplier', False,
+            lambda: chromium_applier(self.storage, self.sid, self.username))
+        self._add_machine_applier('yandex_browser', 'YandexBrowserApplier', False,
+            lambda: yandex_browser_applier(self.storage, self.sid, self.username))
+        self._add_machine_applier('shortcuts', 'ShortcutsApplier', False,
+            lambda: shortcut_applier(self.storage))
+        self._add_machine_applier('gsettings', 'GSettingsApplier', False,
+            lambda: gsettings_applier(self.storage, self.file_cache))
+        self._add_machine_applier('cifs', 'CIFSApplier', False,
+            lambda: cifs_applier(self.storage, self.sid))
+        self._add_machine_applier('cups', 'CUPSApplier', True,
+            lambda: cups_applier(self.storage))
+        self._add_machine_applier('firewall', 'FirewallApplier', True,
+            lambda: firewall_applier(self.storage))
+        self._add_machine_applier('folders', 'FoldersApplier', False,
+            lambda: folder_applier(self.storage, self.sid))
+        self._add_machine_applier('package', 'PackagesApplier', True,
+            lambda: package_applier(self.storage))
+        self._add_machine_applier('ntp', 'NTPApplier', True,
+            lambda: ntp_applier(self.storage))
+        self._add_machine_applier('envvar', None, False,
+            lambda: envvar_applier(self.storage, self.sid))
+        self._add_machine_applier('networkshare', 'NetworksharesApplier', True,
+            lambda: networkshare_applier(self.storage, self.sid))
+        self._add_machine_applier('scripts', 'ScriptsApplier', True,
+            lambda: scripts_applier(self.storage, self.sid))
+        self._add_machine_applier('files', 'FilesApplier', True,
+            lambda: file_applier(self.storage, self.file_cache, self.sid))
+        self._add_machine_applier('ini', 'InifilesApplier', True,
+            lambda: ini_applier(self.storage, self.sid))
+        self._add_machine_applier('kde', 'KdeApplier', True,
+            lambda: kde_applier(self.storage))
 
     def _init_user_appliers(self):
         # User appliers are expected to work with user-writable
         # files and settings, mostly in $HOME.
-        self.user_appliers['shortcuts'] = shortcut_applier_user(self.storage, self.sid, self.username)
-        self.user_appliers['folders'] = folder_applier_user(self.storage, self.sid, self.username)
-        self.user_appliers['gsettings'] = gsettings_applier_user(self.storage, self.file_cache, self.sid, self.username)
-        try:
-            self.user_appliers['cifs'] = cifs_applier_user(self.storage, self.sid, self.username)
-        except Exception as exc:
-            logdata = dict()
-            logdata['applier_name'] = 'cifs'
-            logdata['msg'] = str(exc)
-            log('E25', logdata)
-        self.user_appliers['package'] = package_applier_user(self.storage, self.sid, self.username)
-        self.user_appliers['polkit'] = polkit_applier_user(self.storage, self.sid, self.username)
-        self.user_appliers['envvar'] = envvar_applier_user(self.storage, self.sid, self.username)
-        self.user_appliers['networkshare'] = networkshare_applier(self.storage, self.sid, self.username)
-        self.user_appliers['scripts'] = scripts_applier_user(self.storage, self.sid, self.username)
-        self.user_appliers['files'] = file_applier_user(self.storage, self.file_cache, self.sid, self.username)
-        self.user_appliers['ini'] = ini_applier_user(self.storage, self.sid, self.username)
-        self.user_appliers['kde'] = kde_applier_user(self.storage, self.sid, self.username, self.file_cache)
+        self._add_user_applier('shortcuts', None, False,
+            lambda: shortcut_applier_user(self.storage, self.sid, self.username))
+        self._add_user_applier('folders', 'FoldersApplierUser', False,
+            lambda: folder_applier_user(self.storage, self.sid, self.username))
+        self._add_user_applier('gsettings', 'GSettingsApplierUser', False,
+            lambda: gsettings_applier_user(self.storage, self.file_cache, self.sid, self.username))
+        self._add_user_applier('cifs', 'CIFSApplierUser', False,
+            lambda: cifs_applier_user(self.storage, self.sid, self.username))
+        self._add_user_applier('package', 'PackagesApplierUser', True,
+            lambda: package_applier_user(self.storage, self.sid, self.username))
+        self._add_user_applier('polkit', 'PolkitApplierUser', False,
+            lambda: polkit_applier_user(self.storage, self.sid, self.username))
+        self._add_user_applier('envvar', None, False,
+            lambda: envvar_applier_user(self.storage, self.sid, self.username))
+        self._add_user_applier('networkshare', 'NetworksharesApplierUser', True,
+            lambda: networkshare_applier(self.storage, self.sid, self.username))
+        self._add_user_applier('scripts', 'ScriptsApplierUser', True,
+            lambda: scripts_applier_user(self.storage, self.sid, self.username))
+        self._add_user_applier('files', 'FilesApplierUser', True,
+            lambda: file_applier_user(self.storage, self.file_cache, self.sid, self.username))
+        self._add_user_applier('ini', 'InifilesApplierUser', True,
+            lambda: ini_applier_user(self.storage, self.sid, self.username))
+        self._add_user_applier('kde', 'KdeApplierUser', True,
+            lambda: kde_applier_user(self.storage, self.sid, self.username, self.file_cache))
 
     def machine_apply(self):
         '''
@@ -201,31 +326,74 @@ class frontend_manager:
             return
         log('D16')
 
-        for applier_name, applier_object in self.machine_appliers.items():
-            try:
+        state = applier_state(self.storage
+            , full_apply_interval=self.config.get_full_apply_interval()
+            , force=self.storage._force)
+        state.retain(self.machine_appliers)
+
+        dependencies = _machine_applier_dependencies
+        package = self.machine_appliers.get('package')
+        if package is not None and not package.flagSync:
+            # pkcon_runner is started in background so waiting for the
+            # applier does not make packages installed
+            dependencies = {applier_name: tuple(required for required in required_appliers
+                                                if required != 'package')
+                            for applier_name, required_appliers in dependencies.items()}
+
+        run_appliers(self.machine_appliers
+            , lambda applier_name, applier_object: self._machine_applier_apply(state, applier_name, applier_object)
+            , dependencies
+            , self.config.get_applier_workers())
+
+        state.save()
+
+    def _machine_applier_apply(self, state, applier_name, applier_object):
+        if state.is_unchanged(applier_name, applier_object.inputs):
+            log('D217', {'applier_name': applier_name})
+            return
+        try:
+            # Many appliers log their errors instead of raising them,
+            # state is saved only when nothing failed so the applier is
+            # retried on the next run
+            errors = error_count()
+            with timed('applier_apply', applier_name):
                 applier_object.apply()
-            except Exception as exc:
-                logdata = dict()
-                logdata['applier_name'] = applier_name
-                logdata['msg'] = str(exc)
-                log('E24', logdata)
+            if error_count() == errors:
+                state.update(applier_name, applier_object.inputs)
+            else:
+                state.forget(applier_name)
+        except Exception as exc:
+            state.forget(applier_name)
+            logdata = dict()
+            logdata['applier_name'] = applier_name
+            logdata['msg'] = str(exc)
+            log('E24', logdata)
+
+    def _user_applier_admin_apply(self, applier_name, applier_object):
+        try:
+            with timed('applier_admin_apply', applier_name):
+                applier_object.admin_context_apply()
+        except Exception as exc:
+            logdata = dict()
+            logdata['applier'] = applier_name
+            logdata['exception'] = str(exc)
+            log('E19', logdata)
 
     def user_apply(self):
         '''
         Run appliers for users.
         '''
         if is_root():
-            for applier_name, applier_object in self.user_appliers.items():
-                try:
-                    applier_object.admin_context_apply()
-                except Exception as exc:
-                    logdata = dict()
-                    logdata['applier'] = applier_name
-                    logdata['exception'] = str(exc)
-                    log('E19', logdata)
+            run_appliers(self.user_appliers
+                , self._user_applier_admin_apply
+                , _user_applier_dependencies
+                , self.config.get_applier_workers())
 
             try:
-                with_privileges(self.username, lambda: apply_user_context(self.user_appliers))
+                # Appliers are run in the forked process so they are
+                # measured only as a whole
+                with timed('user_context_apply', self.username):
+                    with_privileges(self.username, lambda: apply_user_context(self.user_appliers))
             except Exception as exc:
                 logdata = dict()
                 logdata['username'] = self.username
@@ -234,7 +402,8 @@ class frontend_manager:
         else:
             for applier_name, applier_object in self.user_appliers.items():
                 try:
-                    applier_object.user_context_apply()
+                    with timed('applier_user_apply', applier_name):
+                        applier_object.user_context_apply()
                 except Exception as exc:
                     logdata = dict({'applier_name': applier_name, 'message': str(exc)})
                     log('E11', logdata)
@@ -25,7 +25,6 @@ from gi.repository import (
       Gio
     , GLib
 )
-from storage.dconf_registry import Dconf_registry
 
 from .applier_frontend import (
       applier_frontend
@@ -137,9 +136,6 @@ class gsettings_applier(applier_frontend):
         except Exception as exc:
             log('E48')
 
-        # Update desktop configuration system backend
-        Dconf_registry.dconf_update()
-
     def apply(self):
         if self.__module_enabled:
             log('D80')
@@ -21,6 +21,7 @@ from pathlib import Path
 from .appliers.ini_file import Ini_file
 from .applier_frontend import (
       applier_frontend
+    , applier_inputs
     , check_enabled
 )
 from util.logging import log
@@ -29,6 +30,7 @@ class ini_applier(applier_frontend):
     __module_name = 'InifilesApplier'
     __module_experimental = True
     __module_enabled = False
+    inputs = applier_inputs(preferences=['inifiles'])
 
     def __init__(self, storage, sid):
         self.storage = storage
@@ -232,13 +232,16 @@ def apply_for_wallpaper(data, file_cache, username):
             data = str(file_cache.get(data))
         except NotUNCPathError:
             data = str(data)
-        os.environ["XDG_DATA_DIRS"] = "/usr/share/kf5:"
+        # Environment is passed to the commands instead of changing
+        # os.environ because other appliers run concurrently
+        env = dict(os.environ)
+        env["XDG_DATA_DIRS"] = "/usr/share/kf5:"
             #Variable for system detection of directories before files with .colors extension
-        os.environ["DISPLAY"] = ":0"
+        env["DISPLAY"] = ":0"
             #Variable for command execution plasma-apply-colorscheme
-        os.environ["XDG_RUNTIME_DIR"] = f"/run/user/{os.getuid()}"
-        os.environ["DBUS_SESSION_BUS_ADDRESS"] = f"unix:path=/run/user/{os.getuid()}/bus"#plasma-apply-wallpaperimage
-        os.environ["PATH"] = "/usr/lib/kf5/bin:"
+        env["XDG_RUNTIME_DIR"] = f"/run/user/{os.getuid()}"
+        env["DBUS_SESSION_BUS_ADDRESS"] = f"unix:path=/run/user/{os.getuid()}/bus"#plasma-apply-wallpaperimage
+        env["PATH"] = "/usr/lib/kf5/bin:"
             #environment variable for accessing binary files without hard links
         if os.path.isfile(path_to_wallpaper):
             id_desktop = get_id_desktop(path_to_wallpaper)
@@ -255,12 +258,12 @@ def apply_for_wallpaper(data, file_cache, username):
                 data
                 ]
             try:
-                subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env)
             except:
                     logdata['command'] = command
                     log('E68', logdata)
             try:
-                session_bus = dbus.SessionBus()
+                session_bus = dbus.bus.BusConnection(env["DBUS_SESSION_BUS_ADDRESS"])
                 plasma_shell = session_bus.get_object('org.kde.plasmashell', '/PlasmaShell', introspect='org.kde.PlasmaShell')
                 plasma_shell_iface = dbus.Interface(plasma_shell, 'org.kde.PlasmaShell')
                 plasma_shell_iface.refreshCurrentShell()
@@ -19,6 +19,7 @@
 from .appliers.netshare import Networkshare
 from .applier_frontend import (
       applier_frontend
+    , applier_inputs
     , check_enabled
 )
 from util.logging import log
@@ -28,6 +29,7 @@ class networkshare_applier(applier_frontend):
     __module_name_user = 'NetworksharesApplierUser'
     __module_experimental = True
     __module_enabled = False
+    inputs = applier_inputs(preferences=['networkshares'])
 
     def __init__(self, storage, sid, username = None):
         self.storage = storage
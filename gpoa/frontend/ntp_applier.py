@@ -24,6 +24,7 @@ from enum import Enum
 
 from .applier_frontend import (
       applier_frontend
+    , applier_inputs
     , check_enabled
 )
 from util.logging import log
@@ -48,6 +49,10 @@ class ntp_applier(applier_frontend):
     __ntp_key_server_enabled = 'Enabled'
 
     __chrony_config = '/etc/chrony.conf'
+    inputs = applier_inputs(
+          branches=[__ntp_branch, __ntp_client_branch, __ntp_server_branch]
+        , outputs=[__chrony_config]
+    )
 
     def __init__(self, storage):
         self.storage = storage
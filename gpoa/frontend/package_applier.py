@@ -27,6 +27,7 @@ from util.rpm import (
 
 from .applier_frontend import (
       applier_frontend
+    , applier_inputs
     , check_enabled
 )
 
@@ -38,6 +39,7 @@ class package_applier(applier_frontend):
     __remove_key_name = 'Remove'
     __sync_key_name = 'Sync'
     __hklm_branch = 'Software\\BaseALT\\Policies\\Packages'
+    inputs = applier_inputs(branches=[__hklm_branch])
 
     def __init__(self, storage):
         self.storage = storage
@@ -54,6 +56,8 @@ class package_applier(applier_frontend):
         self.remove_packages_setting = self.storage.filter_hklm_entries(remove_branch)
         self.sync_packages_setting = self.storage.filter_hklm_entries(sync_branch)
         self.flagSync = True
+        for flag in self.sync_packages_setting:
+            self.flagSync = bool(flag.data)
 
         self.__module_enabled = check_enabled(
               self.storage
@@ -61,9 +65,6 @@ class package_applier(applier_frontend):
             , self.__module_experimental
         )
     def run(self):
-        for flag in self.sync_packages_setting:
-            self.flagSync = bool(flag.data)
-
         if 0 < self.install_packages_setting.count() or 0 < self.remove_packages_setting.count():
             if self.flagSync:
                 try:
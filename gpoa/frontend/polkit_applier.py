@@ -18,6 +18,7 @@
 
 from .applier_frontend import (
       applier_frontend
+    , applier_inputs
     , check_enabled
     , check_windows_mapping_enabled
 )
@@ -36,6 +37,10 @@ class polkit_applier(applier_frontend):
         __registry_branch : ['49-alt_group_policy_permissions', {}],
         __registry_locks_branch : ['47-alt_group_policy_permissions', {}]
     }
+    inputs = applier_inputs(
+          branches=[__deny_all_win, __registry_branch, __registry_locks_branch]
+        , outputs=['/etc/polkit-1/rules.d/{}.rules'.format(rules[0]) for rules in __polkit_map.values()]
+    )
 
     def __init__(self, storage):
         self.storage = storage
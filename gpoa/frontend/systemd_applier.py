@@ -18,6 +18,7 @@
 
 from .applier_frontend import (
       applier_frontend
+    , applier_inputs
     , check_enabled
 )
 from .appliers.systemd import systemd_unit
@@ -30,6 +31,7 @@ class systemd_applier(applier_frontend):
     __module_experimental = False
     __module_enabled = True
     __registry_branch = 'Software/BaseALT/Policies/SystemdUnits'
+    inputs = applier_inputs(branches=[__registry_branch])
 
     def __init__(self, storage):
         self.storage = storage
@@ -18,6 +18,7 @@
 
 from .applier_frontend import (
       applier_frontend
+    , applier_inputs
     , check_enabled
 )
 
@@ -33,6 +34,10 @@ class yandex_browser_applier(applier_frontend):
     __registry_branch = 'Software/Policies/YandexBrowser'
     __managed_policies_path = '/etc/opt/yandex/browser/policies/managed'
     __recommended_policies_path = '/etc/opt/yandex/browser/policies/recommended'
+    inputs = applier_inputs(
+          branches=[__registry_branch]
+        , outputs=[__managed_policies_path, __recommended_policies_path]
+    )
 
     def __init__(self, storage, sid, username):
         self.storage = storage
@@ -20,7 +20,7 @@ import json
 from base64 import b64decode
 from Crypto.Cipher import AES
 from .dynamic_attributes import DynamicAttributes
-from util.xml import get_xml_root
+from util.xml import iter_xml_items
 
 def decrypt_pass(cpassword):
     '''
@@ -59,7 +59,7 @@ def decrypt_pass(cpassword):
 def read_drives(drives_file):
     drives = list()
 
-    for drive in get_xml_root(drives_file):
+    for drive in iter_xml_items(drives_file):
         drive_obj = drivemap()
 
         props = drive.find('Properties')
@@ -36,10 +36,14 @@ class DynamicAttributes:
 
 class RegistryKeyMetadata(DynamicAttributes):
     def __init__(self, policy_name, type, is_list=None):
-        self.policy_name = policy_name
-        self.type = type
-        self.reloaded_with_policy_key = None
-        self.is_list = is_list
+        # Created for every registry value, so attributes are set
+        # directly instead of going through __setattr__
+        self.__dict__.update(
+              policy_name=policy_name
+            , type=str(type) if isinstance(type, Enum) else type
+            , reloaded_with_policy_key=None
+            , is_list=is_list
+        )
 
     def __repr__(self):
         return str(dict(self))
\ No newline at end of file
@@ -16,14 +16,14 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from util.xml import get_xml_root
+from util.xml import iter_xml_items
 from .dynamic_attributes import DynamicAttributes
 
 
 def read_envvars(envvars_file):
     variables = list()
 
-    for var in get_xml_root(envvars_file):
+    for var in iter_xml_items(envvars_file):
         props = var.find('Properties')
         name = props.get('name')
         value = props.get('value')
@@ -16,13 +16,13 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from util.xml import get_xml_root
+from util.xml import iter_xml_items
 from .dynamic_attributes import DynamicAttributes
 
 def read_files(filesxml):
     files = list()
 
-    for fil in get_xml_root(filesxml):
+    for fil in iter_xml_items(filesxml):
         props = fil.find('Properties')
         fil_obj = fileentry(props.get('fromPath'))
         fil_obj.set_action(props.get('action', default='C'))
@@ -20,7 +20,7 @@
 from enum import Enum
 from .dynamic_attributes import DynamicAttributes
 
-from util.xml import get_xml_root
+from util.xml import iter_xml_items
 
 
 
@@ -43,7 +43,7 @@ def folder_int2bool(val):
 def read_folders(folders_file):
     folders = list()
 
-    for fld in get_xml_root(folders_file):
+    for fld in iter_xml_items(folders_file):
         props = fld.find('Properties')
         path = props.get('path')
         action = props.get('action', default='C')
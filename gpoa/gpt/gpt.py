@@ -17,6 +17,8 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
+import multiprocessing
+import threading
 from pathlib import Path
 from enum import Enum, unique
 
@@ -73,6 +75,7 @@ from .networkshares import (
       read_networkshares
     , merge_networkshares
 )
+from .parse_cache import parse_cached
 import util
 import util.preg
 from util.paths import (
@@ -167,10 +170,11 @@ class gpt:
         if 'default' == self.guid:
             self.guid = 'Local Policy'
 
-        self._machine_path = find_dir(self.path, 'Machine')
-        self._user_path = find_dir(self.path, 'User')
-        self._scripts_machine_path = find_dir(self._machine_path, 'Scripts')
-        self._scripts_user_path = find_dir(self._user_path, 'Scripts')
+        index = gpt_index(self.path)
+        self._machine_path = index.find_dir('Machine')
+        self._user_path = index.find_dir('User')
+        self._scripts_machine_path = index.find_dir('Machine', 'Scripts')
+        self._scripts_user_path = index.find_dir('User', 'Scripts')
 
         self.settings_list = [
               'shortcuts'
@@ -188,11 +192,11 @@ class gpt:
         self.settings = dict()
         self.settings['machine'] = dict()
         self.settings['user'] = dict()
-        self.settings['machine']['regpol'] = find_file(self._machine_path, 'registry.pol')
-        self.settings['user']['regpol'] = find_file(self._user_path, 'registry.pol')
+        self.settings['machine']['regpol'] = index.find_file('Machine', 'registry.pol')
+        self.settings['user']['regpol'] = index.find_file('User', 'registry.pol')
         for setting in self.settings_list:
-            machine_preffile = find_preffile(self._machine_path, setting)
-            user_preffile = find_preffile(self._user_path, setting)
+            machine_preffile = index.find_preffile('Machine', setting)
+            user_preffile = index.find_preffile('User', setting)
             mlogdata = dict({'setting': setting, 'prefpath': machine_preffile})
             log('D24', mlogdata)
             self.settings['machine'][setting] = machine_preffile
@@ -200,8 +204,8 @@ class gpt:
             log('D23', ulogdata)
             self.settings['user'][setting] = user_preffile
 
-        self.settings['machine']['scripts'] = find_file(self._scripts_machine_path, 'scripts.ini')
-        self.settings['user']['scripts'] = find_file(self._scripts_user_path, 'scripts.ini')
+        self.settings['machine']['scripts'] = index.find_file('Machine', 'Scripts', 'scripts.ini')
+        self.settings['user']['scripts'] = index.find_file('User', 'Scripts', 'scripts.ini')
 
 
     def set_name(self, name):
@@ -210,62 +214,214 @@ class gpt:
         '''
         self.name = name
 
-    def merge_machine(self):
+    def cache_key(self):
+        '''
+        Identity of GPO contents used to cache parsed files.
+        '''
+        version = self.gpo_info.version if self.gpo_info else None
+        return (self.guid, str(version))
+
+    def parse_machine(self):
+        '''
+        Parse machine settings without merging them to storage.
+        '''
+        return parse_settings(self.settings['machine'], self.cache_key(), self.storage._force)
+
+    def parse_user(self):
+        '''
+        Parse user settings without merging them to storage.
+        '''
+        return parse_settings(self.settings['user'], self.cache_key(), self.storage._force)
+
+    def merge_machine(self, parsed=None):
         '''
         Merge machine settings to storage.
         '''
+        if parsed is None:
+            parsed = self.parse_machine()
         try:
             # Merge machine policies to registry if possible
             if self.settings['machine']['regpol']:
                 mlogdata = dict({'polfile': self.settings['machine']['regpol']})
                 log('D34', mlogdata)
-                util.preg.merge_polfile(self.settings['machine']['regpol'], policy_name=self.name, gpo_info=self.gpo_info)
-            # Merge machine preferences to registry if possible
-            for preference_name, preference_path in self.settings['machine'].items():
-                if preference_path:
-                    preference_type = get_preftype(preference_path)
-                    logdata = dict({'pref': preference_type.value, 'sid': self.sid})
-                    log('D28', logdata)
-                    preference_parser = get_parser(preference_type)
-                    preference_merger = get_merger(preference_type)
-                    preference_objects = preference_parser(preference_path)
-                    preference_merger(self.storage, self.sid, preference_objects, self.name)
+            self._merge_parsed(parsed, 'D28', policy_name=self.name, gpo_info=self.gpo_info)
         except Exception as exc:
             logdata = dict()
             logdata['gpt'] = self.name
             logdata['msg'] = str(exc)
             log('E28', logdata)
 
-    def merge_user(self):
+    def merge_user(self, parsed=None):
         '''
         Merge user settings to storage.
         '''
+        if parsed is None:
+            parsed = self.parse_user()
         try:
             # Merge user policies to registry if possible
             if self.settings['user']['regpol']:
                 mulogdata = dict({'polfile': self.settings['user']['regpol']})
                 log('D35', mulogdata)
-                util.preg.merge_polfile(self.settings['user']['regpol'],
-                                        sid=self.sid,
-                                        policy_name=self.name,
-                                        username=self.username,
-                                        gpo_info=self.gpo_info)
-            # Merge user preferences to registry if possible
-            for preference_name, preference_path in self.settings['user'].items():
-                if preference_path:
-                    preference_type = get_preftype(preference_path)
-                    logdata = dict({'pref': preference_type.value, 'sid': self.sid})
-                    log('D29', logdata)
-                    preference_parser = get_parser(preference_type)
-                    preference_merger = get_merger(preference_type)
-                    preference_objects = preference_parser(preference_path)
-                    preference_merger(self.storage, self.sid, preference_objects, self.name)
+            self._merge_parsed(parsed, 'D29',
+                               sid=self.sid,
+                               policy_name=self.name,
+                               username=self.username,
+                               gpo_info=self.gpo_info)
         except Exception as exc:
             logdata = dict()
             logdata['gpt'] = self.name
             logdata['msg'] = str(exc)
             log('E29', logdata)
 
+    def _merge_parsed(self, parsed, message_code, **preg_args):
+        objects, error = parsed
+        for preference_path, preference_type, preference_objects in objects:
+            if preference_type == FileType.PREG:
+                # Merge policies to registry
+                util.preg.merge_pregfile(preference_objects, preference_path, **preg_args)
+                continue
+            logdata = dict({'pref': preference_type.value, 'sid': self.sid})
+            log(message_code, logdata)
+            preference_merger = get_merger(preference_type)
+            preference_merger(self.storage, self.sid, preference_objects, self.name)
+        # Parsing error interrupts merge at the same place it did when
+        # files were parsed and merged one by one
+        if error:
+            raise error
+
+
+def parse_settings(settings, cache_key=None, refresh=False):
+    '''
+    Parse policy files of the GPT part in merge order. Returns the list
+    of (path, type, parsed objects) and the exception which stopped
+    parsing, if any. Results are cached when cache_key is specified.
+    '''
+    def parse(path, parser):
+        if cache_key is None:
+            return parser(path)
+        return parse_cached(path, parser, cache_key, refresh)
+
+    objects = list()
+    try:
+        if settings['regpol']:
+            objects.append((settings['regpol'], FileType.PREG, parse(settings['regpol'], util.preg.load_preg)))
+        for preference_name, preference_path in settings.items():
+            if preference_path and preference_name != 'regpol':
+                preference_type = get_preftype(preference_path)
+                preference_parser = get_parser(preference_type)
+                objects.append((preference_path, preference_type, parse(preference_path, preference_parser)))
+    except Exception as exc:
+        return objects, exc
+
+    return objects, None
+
+
+# Seconds to wait for the next parsed GPT from worker processes
+_parse_timeout = 60
+
+
+def _parse_settings_args(args):
+    return parse_settings(*args)
+
+
+def parse_gpts(gpts, part, workers=1):
+    '''
+    Parse the part ('machine' or 'user') of every GPT. Parsing is
+    distributed across worker processes while the results are yielded
+    in the order of GPTs so the caller merges them preserving
+    precedence. GPTs are parsed sequentially when workers fail or do
+    not answer in time.
+    '''
+    settings_list = [gptobj.settings[part] for gptobj in gpts]
+    cache_keys = [gptobj.cache_key() for gptobj in gpts]
+    refresh = [gptobj.storage._force for gptobj in gpts]
+    args_list = list(zip(settings_list, cache_keys, refresh))
+    if workers <= 1 or len(args_list) < 2:
+        for args in args_list:
+            yield parse_settings(*args)
+        return
+
+    # Forked process inherits locks held by other threads, e.g. GPO
+    # list requests abandoned inside libads, so workers are forked from
+    # a clean server process unless this is the only thread.
+    method = 'fork' if threading.active_count() == 1 else 'forkserver'
+    parsed_count = 0
+    pool = None
+    try:
+        pool = multiprocessing.get_context(method).Pool(min(workers, len(args_list)))
+        results = pool.imap(_parse_settings_args, args_list)
+        for _ in args_list:
+            parsed = results.next(_parse_timeout)
+            parsed_count += 1
+            yield parsed
+    except Exception as exc:
+        logdata = dict({'exc': exc})
+        log('W25', logdata)
+        for args in args_list[parsed_count:]:
+            yield parse_settings(*args)
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+class gpt_index:
+    '''
+    Case-insensitive index of the parts of GPT directory tree which
+    contain policy files. Every directory is listed once with
+    os.scandir() and entry types are taken from directory listing, so
+    lookups do not touch the file system.
+    '''
+    def __init__(self, path):
+        self.dirs = dict()
+        self.files = dict()
+        if path:
+            self._scan(path, ())
+
+    @staticmethod
+    def _descend(key):
+        # GPT/{Machine,User}/{Preferences/<type>,Scripts}
+        depth = len(key)
+        if depth == 1:
+            return key[0] in ('machine', 'user')
+        if depth == 2:
+            return key[1] in ('preferences', 'scripts')
+        return depth == 3 and key[1] == 'preferences'
+
+    def _scan(self, path, key):
+        subdirs = list()
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    entry_key = key + (entry.name.lower(),)
+                    try:
+                        if entry.is_dir():
+                            # The first matching directory wins just like
+                            # in find_dir()
+                            if entry_key not in self.dirs:
+                                self.dirs[entry_key] = entry.path
+                                subdirs.append(entry_key)
+                        elif entry.is_file():
+                            self.files.setdefault(entry_key, entry.path)
+                    except OSError:
+                        pass
+        except OSError:
+            return
+
+        for subdir in subdirs:
+            if self._descend(subdir):
+                self._scan(self.dirs[subdir], subdir)
+
+    def find_dir(self, *names):
+        return self.dirs.get(tuple(name.lower() for name in names))
+
+    def find_file(self, *names):
+        return self.files.get(tuple(name.lower() for name in names))
+
+    def find_preffile(self, part, prefname):
+        '''
+        Find file with path like part/Preferences/prefname/prefname.xml
+        '''
+        return self.find_file(part, 'Preferences', prefname, '{}.xml'.format(prefname))
+
 def find_dir(search_path, name):
     '''
     Attempt for case-insensitive search of directory
@@ -16,13 +16,13 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from util.xml import get_xml_root
+from util.xml import iter_xml_items
 from .dynamic_attributes import DynamicAttributes
 
 def read_inifiles(inifiles_file):
     inifiles = list()
 
-    for ini in get_xml_root(inifiles_file):
+    for ini in iter_xml_items(inifiles_file):
         prors = ini.find('Properties')
         ini_obj = inifile(prors.get('path'))
         ini_obj.set_section(prors.get('section', default=None))
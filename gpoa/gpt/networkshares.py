@@ -16,13 +16,13 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from util.xml import get_xml_root
+from util.xml import iter_xml_items
 from .dynamic_attributes import DynamicAttributes
 
 def read_networkshares(networksharesxml):
     networkshares = list()
 
-    for share in get_xml_root(networksharesxml):
+    for share in iter_xml_items(networksharesxml):
         props = share.find('Properties')
         networkshare_obj = networkshare(props.get('name'))
         networkshare_obj.set_action(props.get('action', default='C'))
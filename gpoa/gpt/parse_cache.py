@@ -0,0 +1,87 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2019-2024 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+import os
+import pickle
+
+from util.paths import parsed_gpt_cache_dir
+from util.logging import log
+
+
+# Must be incremented every time parsed objects change their layout
+_cache_format = 1
+
+
+def _cache_file(path):
+    return os.path.join(parsed_gpt_cache_dir(),
+                        hashlib.sha1(path.encode('utf-8')).hexdigest())
+
+
+def _cache_key(path, gpo_key):
+    stat = os.stat(path)
+    return (_cache_format, path, gpo_key, stat.st_size, stat.st_mtime_ns)
+
+
+def _load(cache_file, key):
+    try:
+        with open(cache_file, 'rb') as f:
+            cached_key, objects = pickle.load(f)
+    except Exception:
+        return False, None
+    if cached_key != key:
+        return False, None
+    return True, objects
+
+
+def _store(cache_file, key, objects):
+    tmp_file = '{}.{}.tmp'.format(cache_file, os.getpid())
+    try:
+        with open(tmp_file, 'wb') as f:
+            pickle.dump((key, objects), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.rename(tmp_file, cache_file)
+    except Exception as exc:
+        logdata = dict({'cache_file': cache_file, 'exc': exc})
+        log('D215', logdata)
+        try:
+            os.unlink(tmp_file)
+        except OSError:
+            pass
+
+
+def parse_cached(path, parser, gpo_key, refresh=False):
+    '''
+    Parse GPT file with the parser or load the result of the previous
+    parsing. Cached result is used only when GPO (GUID and version),
+    file size and modification time are the same.
+    '''
+    try:
+        key = _cache_key(path, gpo_key)
+    except OSError:
+        return parser(path)
+
+    cache_file = _cache_file(path)
+    if not refresh:
+        found, objects = _load(cache_file, key)
+        if found:
+            log('D214', lambda: dict({'path': path}))
+            return objects
+
+    objects = parser(path)
+    _store(cache_file, key, objects)
+    return objects
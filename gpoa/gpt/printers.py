@@ -19,7 +19,7 @@
 import json
 from .dynamic_attributes import DynamicAttributes
 
-from util.xml import get_xml_root
+from util.xml import iter_xml_items
 
 def read_printers(printers_file):
     '''
@@ -27,7 +27,7 @@ def read_printers(printers_file):
     '''
     printers = list()
 
-    for prn in get_xml_root(printers_file):
+    for prn in iter_xml_items(printers_file):
         prn_obj = printer(prn.tag, prn.get('name'), prn.get('status'))
         if 'PortPrinter' == prn.tag:
             prn_obj.set_ip(prn.get('ipAddress'))
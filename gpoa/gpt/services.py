@@ -16,7 +16,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from util.xml import get_xml_root
+from util.xml import iter_xml_items
 from .dynamic_attributes import DynamicAttributes
 
 def read_services(service_file):
@@ -25,7 +25,7 @@ def read_services(service_file):
     '''
     services = list()
 
-    for srv in get_xml_root(service_file):
+    for srv in iter_xml_items(service_file):
         srv_obj = service(srv.get('name'))
         srv_obj.set_clsid(srv.get('clsid'))
         srv_obj.set_usercontext(srv.get('userContext'))
@@ -25,7 +25,7 @@ from xdg.DesktopEntry import DesktopEntry
 import json
 
 from util.windows import transform_windows_path
-from util.xml import get_xml_root
+from util.xml import iter_xml_items
 from util.paths import get_desktop_files_directory
 from .dynamic_attributes import DynamicAttributes
 
@@ -72,7 +72,7 @@ def read_shortcuts(shortcuts_file):
     '''
     shortcuts = list()
 
-    for link in get_xml_root(shortcuts_file):
+    for link in iter_xml_items(shortcuts_file):
         props = link.find('Properties')
         # Location of the link itself
         dest = props.get('shortcutPath')
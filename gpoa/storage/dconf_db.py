@@ -0,0 +1,493 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2019-2024 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+import os
+import struct
+import tempfile
+import gi
+gi.require_version("Gvdb", "1.0")
+gi.require_version("GLib", "2.0")
+from gi.repository import Gvdb, GLib
+
+
+_profile_dirs = ['/etc/dconf/profile', '/usr/share/dconf/profile']
+_system_db_dir = '/etc/dconf/db'
+_locks_table = '.locks'
+
+
+def load_gvdb_table(path):
+    '''
+    Load compiled dconf database (GVDB file) from disk.
+    '''
+    contents = GLib.file_get_contents(path)
+    if not contents[0]:
+        return None
+    return Gvdb.Table.new_from_bytes(GLib.Bytes.new(contents[1]), True)
+
+
+def file_signature(path):
+    '''
+    Get tuple which changes every time the file is replaced or
+    rewritten. None means that file does not exist.
+    '''
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+class dconf_db_source:
+    '''
+    Single database referenced by dconf profile. The database is
+    reloaded only when the file on disk is replaced, so repeated
+    lookups are in-memory hash probes.
+    '''
+    def __init__(self, path, writable=False):
+        self.path = path
+        self.writable = writable
+        self._signature = None
+        self._values = None
+        self._locks = None
+
+    def refresh(self):
+        signature = file_signature(self.path)
+        if signature == self._signature:
+            return
+        self._signature = signature
+        self._values = None
+        self._locks = None
+        if signature is None:
+            return
+        self._values = load_gvdb_table(self.path)
+        if self._values and not self.writable:
+            try:
+                self._locks = self._values.get_table(_locks_table)
+            except Exception:
+                self._locks = None
+
+    def get_value(self, key):
+        if not self._values:
+            return None
+        return self._values.get_value(key)
+
+    def is_locked(self, key):
+        if not self._locks:
+            return False
+        return bool(self._locks.has_value(key))
+
+    def get_names(self):
+        if not self._values:
+            return list()
+        return self._values.get_names()
+
+
+class dconf_profile_reader:
+    '''
+    In-process replacement for "dconf read" and "dconf list" which
+    follows the layering of databases listed in dconf profile.
+    '''
+    def __init__(self, profile):
+        self.profile = profile
+        self.profile_path = find_profile(profile)
+        self._signature = None
+        self.sources = list()
+
+    def refresh(self):
+        signature = file_signature(self.profile_path) if self.profile_path else None
+        if not self.sources or signature != self._signature:
+            self._signature = signature
+            self.sources = parse_profile(self.profile_path)
+        for source in self.sources:
+            source.refresh()
+
+    def read(self, key):
+        '''
+        Get GLib.Variant for the key or None if the key is not set.
+        Just like dconf engine does, lookup starts from the lowest
+        database which locks the key.
+        '''
+        self.refresh()
+        key = normalize_key(key)
+        lock_level = 0
+        for level in range(len(self.sources) - 1, 0, -1):
+            if self.sources[level].is_locked(key):
+                lock_level = level
+                break
+        for source in self.sources[lock_level:]:
+            value = source.get_value(key)
+            if value is not None:
+                return value
+        return None
+
+    def list(self, path):
+        '''
+        Get all keys placed under the directory path, recursively.
+        '''
+        path = normalize_key(path)
+        if not path.endswith('/'):
+            return [path]
+        self.refresh()
+        keys = set()
+        for source in self.sources:
+            for name in source.get_names():
+                if name.startswith(path) and not name.endswith('/'):
+                    keys.add(name)
+        return sorted(keys)
+
+
+def normalize_key(key):
+    if not key.startswith('/'):
+        return '/' + key
+    return key
+
+
+def find_profile(profile):
+    '''
+    Resolve DCONF_PROFILE value to the path of the profile file.
+    '''
+    if not profile:
+        return None
+    if profile.startswith('/'):
+        return profile
+    for profile_dir in _profile_dirs:
+        profile_path = os.path.join(profile_dir, profile)
+        if os.path.isfile(profile_path):
+            return profile_path
+    return None
+
+
+def parse_profile(profile_path):
+    '''
+    Build the list of database sources out of dconf profile. The
+    first source has the highest priority. Without profile dconf
+    uses only user database.
+    '''
+    lines = ['user-db:user']
+    if profile_path:
+        try:
+            with open(profile_path, 'r') as f:
+                lines = f.readlines()
+        except OSError:
+            pass
+
+    sources = list()
+    for line in lines:
+        line = line.partition('#')[0].strip()
+        db_type, _, db_name = line.partition(':')
+        if not db_name:
+            continue
+        if db_type == 'user-db':
+            db_path = os.path.join(GLib.get_user_config_dir(), 'dconf', db_name)
+            sources.append(dconf_db_source(db_path, not sources))
+        elif db_type == 'system-db':
+            sources.append(dconf_db_source(os.path.join(_system_db_dir, db_name)))
+        elif db_type == 'file-db':
+            sources.append(dconf_db_source(db_name))
+    return sources
+
+
+_readers = dict()
+
+def get_profile_reader(profile):
+    '''
+    Get cached reader for the specified dconf profile.
+    '''
+    if profile not in _readers:
+        _readers[profile] = dconf_profile_reader(profile)
+    return _readers[profile]
+
+
+# GVDB on-disk format, see gvdb/gvdb-format.h in GLib sources
+_gvdb_signature = b'GVariant'
+_gvdb_header = struct.Struct('<8sIIII')
+_gvdb_hash_header = struct.Struct('<II')
+_gvdb_hash_item = struct.Struct('<IIIHccII')
+_gvdb_no_parent = 0xffffffff
+
+
+def gvdb_hash(key):
+    '''
+    DJB hash over signed bytes of the key, as calculated by GVDB.
+    '''
+    value = 5381
+    for byte in key:
+        value = (value * 33 + (byte - 256 if byte > 127 else byte)) & 0xffffffff
+    return value
+
+
+def get_parent_key(key):
+    '''
+    Get the directory which contains the key (or directory),
+    None for the root directory.
+    '''
+    if key == '/':
+        return None
+    return key[:key.rstrip('/').rfind('/') + 1]
+
+
+def serialize_variant(value):
+    '''
+    Serialize value as GVariant of type "v" in the normal form.
+    Only the types which end up in the policy database are
+    supported: integers are stored as int32 (int64 when out of
+    range) and everything else as string.
+    '''
+    if isinstance(value, int):
+        if -2**31 <= value < 2**31:
+            return struct.pack('<i', value) + b'\0i'
+        return struct.pack('<q', value) + b'\0x'
+    # Revert escaping done for GVariant text format in clean_data()
+    data = str(value).replace('\\\\', '\\').replace('\0', '')
+    return data.encode('utf-8', 'replace') + b'\0\0s'
+
+
+def is_valid_key(key):
+    return (key.startswith('/')
+            and not key.endswith('/')
+            and '//' not in key)
+
+
+class gvdb_item:
+    __slots__ = ('key', 'hash', 'parent', 'value', 'children', 'table', 'index')
+
+    def __init__(self, key, value=None):
+        self.key = key
+        self.hash = gvdb_hash(key.encode('utf-8'))
+        self.parent = None
+        self.value = value
+        self.children = list()
+        self.table = None
+        self.index = None
+
+
+def read_dconf_locks(keyfile_dir):
+    '''
+    Read keys listed in the files of "locks" subdirectory of keyfile
+    directory, just like "dconf compile" does.
+    '''
+    locks = list()
+    locks_dir = os.path.join(keyfile_dir, 'locks')
+    try:
+        lock_files = sorted(os.listdir(locks_dir))
+    except OSError:
+        return locks
+    for lock_file in lock_files:
+        if lock_file.startswith('.'):
+            continue
+        try:
+            with open(os.path.join(locks_dir, lock_file), 'r') as f:
+                lines = f.readlines()
+        except OSError:
+            continue
+        for line in lines:
+            line = line.strip()
+            if line and not line.startswith('#') and is_valid_key(line):
+                locks.append(line)
+    return locks
+
+
+def serialize_dconf_db(data, locks=()):
+    '''
+    Build the contents of compiled dconf database out of dictionary
+    of dictionaries the same way "dconf compile" does for the keyfile
+    created by create_dconf_ini_file(). Locked keys are stored in the
+    nested ".locks" table.
+    '''
+    items = dict()
+    for section, section_data in data.items():
+        for valuename, value in section_data.items():
+            key = '/{}/{}'.format(section, str(valuename).strip())
+            if not is_valid_key(key):
+                continue
+            if key in items:
+                items[key].value = value
+            else:
+                items[key] = gvdb_item(key, value)
+
+    # Every key is accompanied by the chain of its directories
+    for key in list(items):
+        child = items[key]
+        parent_key = get_parent_key(key)
+        while parent_key is not None and child.parent is None:
+            parent = items.get(parent_key)
+            if parent is None:
+                parent = items[parent_key] = gvdb_item(parent_key)
+            child.parent = parent
+            parent.children.append(child)
+            child, parent_key = parent, get_parent_key(parent_key)
+
+    if locks:
+        locks_item = gvdb_item(_locks_table)
+        locks_item.table = [gvdb_item(lock, '') for lock in dict.fromkeys(locks)]
+        items[_locks_table] = locks_item
+
+    out = bytearray(_gvdb_header.size)
+    table_start, table_end = pack_gvdb_table(out, list(items.values()))
+    _gvdb_header.pack_into(out, 0, _gvdb_signature, 0, 0, table_start, table_end)
+    return bytes(out)
+
+
+def allocate(out, size, alignment):
+    out.extend(b'\0' * (-len(out) % alignment))
+    start = len(out)
+    out.extend(b'\0' * size)
+    return start
+
+
+def pack_gvdb_table(out, items):
+    '''
+    Append hash table of the items to the output and return its
+    boundaries. Items of nested tables are appended recursively.
+    '''
+    n_buckets = len(items)
+    buckets = [list() for _ in range(n_buckets)]
+    for item in items:
+        buckets[item.hash % n_buckets].append(item)
+    ordered = list()
+    bucket_starts = list()
+    for bucket in buckets:
+        bucket_starts.append(len(ordered))
+        for item in bucket:
+            item.index = len(ordered)
+            ordered.append(item)
+
+    table_size = (_gvdb_hash_header.size + 4 * n_buckets
+                  + _gvdb_hash_item.size * len(ordered))
+    table_start = allocate(out, table_size, 4)
+    _gvdb_hash_header.pack_into(out, table_start, 0, n_buckets)
+    struct.pack_into('<{}I'.format(n_buckets), out,
+                     table_start + _gvdb_hash_header.size, *bucket_starts)
+    items_start = table_start + _gvdb_hash_header.size + 4 * n_buckets
+
+    for item in ordered:
+        if item.parent is not None:
+            parent_index = item.parent.index
+            basename = item.key[len(item.parent.key):]
+        else:
+            parent_index = _gvdb_no_parent
+            basename = item.key
+        basename = basename.encode('utf-8')
+        key_start = allocate(out, len(basename), 1)
+        out[key_start:] = basename
+
+        if item.table is not None:
+            item_type = b'H'
+            value_start, value_end = pack_gvdb_table(out, item.table)
+        elif item.children:
+            item_type = b'L'
+            children = sorted(item.children, key=lambda child: child.key.encode('utf-8'))
+            value_start = allocate(out, 4 * len(children), 4)
+            struct.pack_into('<{}I'.format(len(children)), out, value_start,
+                             *[child.index for child in children])
+            value_end = len(out)
+        else:
+            item_type = b'v'
+            variant = serialize_variant(item.value)
+            value_start = allocate(out, len(variant), 8)
+            out[value_start:] = variant
+            value_end = len(out)
+
+        _gvdb_hash_item.pack_into(out, items_start + _gvdb_hash_item.size * item.index,
+                                  item.hash, parent_index, key_start, len(basename),
+                                  item_type, b'\0', value_start, value_end)
+
+    return table_start, table_start + table_size
+
+
+def get_dconf_db_hash_file(path):
+    return '{}.sha256'.format(path)
+
+
+def read_dconf_db_hash(path):
+    '''
+    Get the content hash saved on the last write of the database.
+    The hash is valid only while the database file is the one
+    written along with it.
+    '''
+    try:
+        with open(get_dconf_db_hash_file(path), 'r') as f:
+            digest, _, signature = f.read().strip().partition(' ')
+    except OSError:
+        return None
+    if signature != ' '.join(map(str, file_signature(path) or ())):
+        return None
+    return digest
+
+
+def save_dconf_db_hash(path, digest):
+    hash_file = get_dconf_db_hash_file(path)
+    tmp_file = '{}.tmp'.format(hash_file)
+    with open(tmp_file, 'w') as f:
+        f.write('{} {}\n'.format(digest, ' '.join(map(str, file_signature(path)))))
+    os.rename(tmp_file, hash_file)
+
+
+def dconf_db_changed(path, contents):
+    '''
+    Check if serialized database differs from the one written last
+    time.
+    '''
+    return read_dconf_db_hash(path) != hashlib.sha256(contents).hexdigest()
+
+
+def replace_dconf_db(path, contents):
+    '''
+    Atomically replace compiled dconf database with the new contents
+    and invalidate the previous file so running dconf clients reopen
+    the database, just like "dconf update" does.
+    '''
+    dirname, basename = os.path.split(path)
+    try:
+        old_fd = os.open(path, os.O_WRONLY)
+    except OSError:
+        old_fd = None
+
+    try:
+        fd, tmp_path = tempfile.mkstemp(prefix='.{}.'.format(basename), dir=dirname)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(contents)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, 0o644)
+            os.rename(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        if old_fd is not None:
+            os.pwrite(old_fd, b'\0' * len(_gvdb_signature), 0)
+    finally:
+        if old_fd is not None:
+            os.close(old_fd)
+    save_dconf_db_hash(path, hashlib.sha256(contents).hexdigest())
+
+
+def write_dconf_db(path, data, locks=()):
+    '''
+    Write compiled dconf database unless the contents are the same as
+    the last time, so dconf clients are not notified needlessly.
+    Returns True if the file was written.
+    '''
+    contents = serialize_dconf_db(data, locks)
+    if not dconf_db_changed(path, contents):
+        return False
+    replace_dconf_db(path, contents)
+    return True
@@ -21,9 +21,11 @@ from pathlib import Path
 from util.util import string_to_literal_eval, touch_file, get_uid_by_username
 from util.paths import get_dconf_config_path
 from util.logging import log
-import re
-from collections import OrderedDict
+from storage.dconf_db import get_profile_reader, load_gvdb_table
+from storage.registry_index import registry_index, split_path, tracked_dict
+import hashlib
 import itertools
+import json
 from gpt.dynamic_attributes import RegistryKeyMetadata
 import gi
 gi.require_version("Gvdb", "1.0")
@@ -40,6 +42,35 @@ class PregDconf():
         self.data = data
 
 
+class preference_set:
+    '''
+    Preference objects of one type keyed by their identity (the target
+    they configure). Object merged later replaces the previous object
+    with the same identity, so only resolved preferences are kept.
+    '''
+    def __init__(self, identity):
+        self.identity = identity
+        self.items = dict()
+
+    def add(self, obj):
+        key = self.identity(obj)
+        previous = self.items.pop(key, None)
+        if previous is not None:
+            log('D216', lambda: dict({'key': key
+                                    , 'policy_name': previous.policy_name
+                                    , 'new_policy_name': obj.policy_name}))
+        self.items[key] = obj
+
+    def clear(self):
+        self.items.clear()
+
+    def __iter__(self):
+        return iter(self.items.values())
+
+    def __len__(self):
+        return len(self.items)
+
+
 class gplist(list):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -59,7 +90,7 @@ class Dconf_registry():
     '''
     _GpoPriority = 'Software/BaseALT/Policies/GpoPriority'
     _gpo_name = set()
-    global_registry_dict = dict({_GpoPriority:{}})
+    global_registry_dict = tracked_dict({_GpoPriority:{}})
     __template_file = '/usr/share/dconf/user_mandatory.template'
     _policies_path = 'Software/'
     _policies_win_path = 'SOFTWARE/'
@@ -72,22 +103,25 @@ class Dconf_registry():
     _uid = None
     _envprofile = None
     _path_bin_system = "/etc/dconf/db/policy"
+    _registry_index = None
 
-    list_keys = list()
     _info = dict()
     _counter_gpt = itertools.count(0)
 
-    shortcuts = list()
-    folders = list()
-    files = list()
-    drives = list()
+    shortcuts = preference_set(lambda sc: (sc.dest, sc.is_in_user_context))
+    folders = preference_set(lambda fld: fld.path)
+    files = preference_set(lambda fil: (fil.fromPath, fil.targetPath))
+    # Drive is identified by its letter unless the first available
+    # letter is used (useLetter="0")
+    drives = preference_set(lambda drv: str(drv.dir).upper() if drv.useLetter != '0' else drv.path)
     scheduledtasks = list()
-    environmentvariables = list()
-    inifiles = list()
+    environmentvariables = preference_set(lambda var: var.name)
+    inifiles = preference_set(lambda ini: (ini.path, ini.section, ini.property))
     services = list()
-    printers = list()
+    printers = preference_set(lambda prn: prn.name)
+    # Scripts are run in order and the same script may be run several times
     scripts = list()
-    networkshares = list()
+    networkshares = preference_set(lambda share: share.name)
     trans_table = str.maketrans({
                         '\n': '',
                         '\r': '',
@@ -114,24 +148,13 @@ class Dconf_registry():
     def get_matching_keys(path):
         if path[0] != '/':
             path = '/' + path
-        logdata = dict()
-        envprofile = get_dconf_envprofile()
+        reader = get_profile_reader(get_dconf_envprofile()['DCONF_PROFILE'])
         try:
-            process = subprocess.Popen(['dconf', 'list', path],
-                                       env=envprofile, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            logdata['path'] = path
-            log('D204', logdata)
-            output, error = process.communicate()
-            if not output and not error:
-                return
-            if not error:
-                keys = output.strip().split('\n')
-                for key in keys:
-                    Dconf_registry.get_matching_keys(f'{path}{key}')
-            else:
-                Dconf_registry.list_keys.append(path)
-            return Dconf_registry.list_keys
+            log('D204', lambda: dict({'path': path}))
+            return reader.list(path)
         except Exception as exc:
+            logdata = dict()
+            logdata['path'] = path
             logdata['exc'] = exc
             log('E69', logdata)
             return None
@@ -146,22 +169,22 @@ class Dconf_registry():
     @staticmethod
     def get_key_value(key):
         logdata = dict()
-        envprofile = get_dconf_envprofile()
+        reader = get_profile_reader(get_dconf_envprofile()['DCONF_PROFILE'])
         try:
-            process = subprocess.Popen(['dconf', 'read', key],
-                                       env=envprofile, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
             logdata['key'] = key
-            output, error = process.communicate()
-
-            if not error:
-                return string_to_literal_eval(string_to_literal_eval(output))
-            else:
+            value = reader.read(key)
+            if value is None:
                 return None
+            data = value.unpack()
+            if isinstance(data, str):
+                return string_to_literal_eval(data)
+            return data
         except Exception as exc:
             logdata['exc'] = exc
             log('E70', logdata)
         return None
 
+
     @staticmethod
     def dconf_update(uid=None, custom_db_file=None, custom_path=None):
         logdata = dict()
@@ -252,10 +275,8 @@ class Dconf_registry():
             path_bin = self._path_bin_system + str(uid)
         output_dict = {}
         try:
-            if (GLib.file_get_contents(path_bin)[0]):
-                bytes1 = GLib.Bytes.new(GLib.file_get_contents(path_bin)[1])
-                table = Gvdb.Table.new_from_bytes(bytes1, True)
-
+            table = load_gvdb_table(path_bin)
+            if table:
                 name_list = Gvdb.Table.get_names(table)
                 for name in name_list:
                     value = Gvdb.Table.get_value(table, name)
@@ -276,16 +297,33 @@ class Dconf_registry():
         return output_dict
 
 
+    @classmethod
+    def get_registry_index(cls):
+        '''
+        Get prefix index over global registry dictionary. The index is
+        built once and then updated with the sections added to the
+        dictionary.
+        '''
+        if not isinstance(cls.global_registry_dict, tracked_dict):
+            cls.global_registry_dict = tracked_dict(cls.global_registry_dict)
+        if (not cls._registry_index
+                or cls._registry_index.registry_dict is not cls.global_registry_dict):
+            cls._registry_index = registry_index(cls.global_registry_dict)
+        else:
+            cls._registry_index.sync()
+        return cls._registry_index
+
+
     @classmethod
     def filter_entries(cls, startswith, registry_dict = None):
-        if not registry_dict:
-            registry_dict = cls.global_registry_dict
         if startswith[-1] == '%':
             startswith = startswith[:-1]
-            if startswith[-1] == '/' or startswith[-1] == '\\':
-                startswith = startswith[:-1]
-            return filter_dict_keys(startswith, flatten_dictionary(registry_dict))
-        return filter_dict_keys(startswith, flatten_dictionary(registry_dict))
+        if not registry_dict:
+            return cls.get_registry_index().filter(startswith)
+        # Building the index does not pay off for a single query
+        prefix = split_path(startswith)
+        return {key: value for key, value in flatten_dictionary(registry_dict).items()
+                if split_path(key)[:len(prefix)] == prefix}
 
 
     @classmethod
@@ -332,7 +370,7 @@ class Dconf_registry():
 
     @classmethod
     def filling_storage_from_dconf(cls):
-        Dconf_registry.global_registry_dict = Dconf_registry.get_storage()
+        Dconf_registry.global_registry_dict = tracked_dict(Dconf_registry.get_storage())
 
 
     @classmethod
@@ -367,31 +405,31 @@ class Dconf_registry():
     @classmethod
     def add_shortcut(cls, sid, sc_obj, policy_name):
         sc_obj.policy_name = policy_name
-        cls.shortcuts.append(sc_obj)
+        cls.shortcuts.add(sc_obj)
 
 
     @classmethod
     def add_printer(cls, sid, pobj, policy_name):
         pobj.policy_name = policy_name
-        cls.printers.append(pobj)
+        cls.printers.add(pobj)
 
 
     @classmethod
     def add_drive(cls, sid, dobj, policy_name):
         dobj.policy_name = policy_name
-        cls.drives.append(dobj)
+        cls.drives.add(dobj)
 
 
     @classmethod
     def add_folder(cls, sid, fobj, policy_name):
         fobj.policy_name = policy_name
-        cls.folders.append(fobj)
+        cls.folders.add(fobj)
 
 
     @classmethod
     def add_envvar(self, sid, evobj, policy_name):
         evobj.policy_name = policy_name
-        self.environmentvariables.append(evobj)
+        self.environmentvariables.add(evobj)
 
 
     @classmethod
@@ -403,43 +441,43 @@ class Dconf_registry():
     @classmethod
     def add_file(cls, sid, fileobj, policy_name):
         fileobj.policy_name = policy_name
-        cls.files.append(fileobj)
+        cls.files.add(fileobj)
 
 
     @classmethod
     def add_ini(cls, sid, iniobj, policy_name):
         iniobj.policy_name = policy_name
-        cls.inifiles.append(iniobj)
+        cls.inifiles.add(iniobj)
 
 
     @classmethod
     def add_networkshare(cls, sid, networkshareobj, policy_name):
         networkshareobj.policy_name = policy_name
-        cls.networkshares.append(networkshareobj)
+        cls.networkshares.add(networkshareobj)
 
 
     @classmethod
     def get_shortcuts(cls, sid):
-        return cls.shortcuts
+        return list(cls.shortcuts)
 
 
     @classmethod
     def get_printers(cls, sid):
-        return cls.printers
+        return list(cls.printers)
 
 
     @classmethod
     def get_drives(cls, sid):
-        return cls.drives
+        return list(cls.drives)
 
     @classmethod
     def get_folders(cls, sid):
-        return cls.folders
+        return list(cls.folders)
 
 
     @classmethod
     def get_envvars(cls, sid):
-        return cls.environmentvariables
+        return list(cls.environmentvariables)
 
 
     @classmethod
@@ -459,17 +497,17 @@ class Dconf_registry():
 
     @classmethod
     def get_files(cls, sid):
-        return cls.files
+        return list(cls.files)
 
 
     @classmethod
     def get_networkshare(cls, sid):
-        return cls.networkshares
+        return list(cls.networkshares)
 
 
     @classmethod
     def get_ini(cls, sid):
-        return cls.inifiles
+        return list(cls.inifiles)
 
 
     @classmethod
@@ -479,18 +517,7 @@ class Dconf_registry():
 
     @classmethod
     def wipe_hklm(cls):
-        cls.global_registry_dict = dict({cls._GpoPriority:{}})
-
-
-def filter_dict_keys(starting_string, input_dict):
-    result = dict()
-    for key in input_dict:
-        key_list = remove_empty_values(re.split(r'\\|/', key))
-        start_list = remove_empty_values(re.split(r'\\|/', starting_string))
-        if key_list[:len(start_list)] == start_list:
-            result[key] = input_dict.get(key)
-
-    return result
+        cls.global_registry_dict = tracked_dict({cls._GpoPriority:{}})
 
 
 def find_preg_type(argument):
@@ -559,51 +586,98 @@ def add_to_dict(string, username, gpo_info):
 
 def load_preg_dconf(pregfile, pathfile, policy_name, username, gpo_info):
     '''
-    Loads the configuration from preg registry into a dictionary
+    Loads the configuration from preg registry into the global registry
+    dictionary in a single pass. Values of the file override values of
+    previously loaded files (GPO precedence) and list values are merged.
     '''
-    # Prefix for storing key data
-    source_pre = "Source"
-    dd = dict()
+    target = Dconf_registry.global_registry_dict
+    # Sections resolved for every (entry kind, keyname) pair
+    sections = dict()
+    # Per section: names of the lists written from this file mapped to
+    # True if the list was created by this file and to False if the
+    # file extends the list loaded before
+    lists = dict()
+    # Per source section: names of the metadata written from this file
+    sources = dict()
+
     for i in pregfile.entries:
+        valuename = i.valuename
         # Skip this entry if the valuename starts with '**del'
-        if i.valuename.lower().startswith('**del'):
+        if valuename.lower().startswith('**del'):
             continue
-        valuename = convert_string_dconf(i.valuename)
         data = check_data(i.data, i.type)
-        if i.valuename != i.data and i.valuename:
-            if i.keyname.replace('\\', '/') in dd:
-                # If the key exists in dd, update its value with the new key-value pair
-                dd[i.keyname.replace('\\', '/')].update({valuename.replace('\\', '/'):data})
-                dd[f"{source_pre}/{i.keyname}".replace('\\', '/')].update({valuename.replace('\\', '/'):RegistryKeyMetadata(policy_name, i.type)})
-            else:
-                # If the key does not exist in dd, create a new key-value pair
-                dd[i.keyname.replace('\\', '/')] = {valuename.replace('\\', '/'):data}
-                dd[f"{source_pre}/{i.keyname}".replace('\\', '/')] = {valuename.replace('\\', '/'):RegistryKeyMetadata(policy_name, i.type)}
-
-        elif not i.valuename:
-            keyname_tmp = i.keyname.replace('\\', '/').split('/')
-            keyname = '/'.join(keyname_tmp[:-1])
-            if keyname in dd:
-                # If the key exists in dd, update its value with the new key-value pair
-                dd[keyname].update({keyname_tmp[-1]:data})
-                dd[f"{source_pre}{keyname}"].update({keyname_tmp[-1]:RegistryKeyMetadata(policy_name, i.type)})
-            else:
-                # If the key does not exist in dd, create a new key-value pair
-                dd[keyname] = {keyname_tmp[-1]:data}
-                dd[f"{source_pre}{keyname}"] = {keyname_tmp[-1]:RegistryKeyMetadata(policy_name, i.type)}
 
+        if valuename and valuename != i.data:
+            kind = 0
+        elif not valuename:
+            kind = 1
+        else:
+            kind = 2
+
+        section = sections.get((kind, i.keyname))
+        if section is None:
+            section = _preg_section(target, kind, i.keyname, lists, sources)
+            sections[(kind, i.keyname)] = section
+        data_section, source_section, section_lists, section_sources, name = section
+        if not kind:
+            name = convert_string_dconf(valuename).replace('\\', '/')
+
+        if kind == 2:
+            # If the value name is the same as the data, the data
+            # is the item of the list stored under the keyname
+            current = data_section.get(name)
+            fresh = section_lists.get(name) if isinstance(current, list) else None
+            if fresh is None:
+                fresh = not isinstance(current, list)
+                if fresh:
+                    current = data_section[name] = list()
+                section_lists[name] = fresh
+            if fresh or data not in current:
+                current.append(data)
+            if name in section_sources:
+                continue
+            metadata = RegistryKeyMetadata(policy_name, i.type, True)
         else:
-            # If the value name is the same as the data,
-            # split the keyname and add the data to the appropriate location in dd.
-            all_list_key = i.keyname.split('\\')
-            dd_target = dd.setdefault('/'.join(all_list_key[:-1]),{})
-            key_d ='/'.join(all_list_key[:-1])
-            dd_target_source = dd.setdefault(f"Source/{key_d}",{})
-            dd_target.setdefault(all_list_key[-1], []).append(data)
-            dd_target_source.setdefault(all_list_key[-1], RegistryKeyMetadata(policy_name, i.type, True))
+            data_section[name] = data
+            if section_lists:
+                section_lists.pop(name, None)
+            metadata = RegistryKeyMetadata(policy_name, i.type)
+
+        previous = source_section.get(name)
+        if name in section_sources:
+            # Keep the chain of overridden policies collected before this file
+            metadata.reloaded_with_policy_key = previous.reloaded_with_policy_key
+        else:
+            section_sources.add(name)
+            if previous is not None:
+                metadata.reloaded_with_policy_key = [previous.policy_name]
+                if previous.reloaded_with_policy_key:
+                    metadata.reloaded_with_policy_key += previous.reloaded_with_policy_key
+        source_section[name] = metadata
 
-    # Update the global registry dictionary with the contents of dd
-    update_dict(Dconf_registry.global_registry_dict, dd)
+
+def _preg_section(target, kind, keyname, lists, sources):
+    '''
+    Resolve the data and source sections of the global registry
+    dictionary for the PReg keyname. The keyname is normalized only
+    once per file.
+    '''
+    name = None
+    if kind == 0:
+        path = keyname.replace('\\', '/')
+        source_path = 'Source/{}'.format(path)
+    elif kind == 1:
+        path, _, name = keyname.replace('\\', '/').rpartition('/')
+        source_path = 'Source{}'.format(path)
+    else:
+        path, _, name = keyname.rpartition('\\')
+        path = path.replace('\\', '/')
+        source_path = 'Source/{}'.format(path)
+    return (target.setdefault(path, dict())
+          , target.setdefault(source_path, dict())
+          , lists.setdefault(path, dict())
+          , sources.setdefault(source_path, set())
+          , name)
 
 
 def create_dconf_ini_file(filename, data, uid=None):
@@ -624,12 +698,12 @@ def create_dconf_ini_file(filename, data, uid=None):
                 if isinstance(value, int):
                     file.write(f'{key} = {value}\n')
                 else:
+                    value = str(value).replace('"', '\\"')
                     file.write(f'{key} = "{value}"\n')
             file.write('\n')
     logdata = dict()
     logdata['path'] = filename
     log('D209', logdata)
-    Dconf_registry.dconf_update(uid)
 
 def clean_data(data):
     try:
@@ -648,24 +722,25 @@ def check_data(data, t_data):
         return data
     return clean_data(data)
 
+_dconf_macros = (
+      ('/', '%oneslash%')
+    , ('//', '%doubleslash%')
+    , (';', '%semicolon%')
+    , ('#', '%sharp%')
+)
+
 def convert_string_dconf(input_string):
-    macros = {
-        '#': '%sharp%',
-        ';': '%semicolon%',
-        '//': '%doubleslash%',
-        '/': '%oneslash%'
-    }
-    output_string = input_string
-    for key, value in macros.items():
+    if ('%' not in input_string and '/' not in input_string
+        and ';' not in input_string and '#' not in input_string):
+        return input_string
+    # Only the last applicable macro of '#', ';', '//', '/' takes effect
+    for key, value in _dconf_macros:
         if key in input_string:
-            output_string = input_string.replace(key, value)
+            return input_string.replace(key, value)
         elif value in input_string:
-            output_string = input_string.replace(value, key)
+            return input_string.replace(value, key)
 
-    return output_string
-
-def remove_empty_values(input_list):
-    return list(filter(None, input_list))
+    return input_string
 
 def flatten_dictionary(input_dict, result=None, current_key=''):
     if result is None:
@@ -697,35 +772,56 @@ def get_dconf_envprofile():
     return {'DCONF_PROFILE': profile}
 
 
-def convert_elements_to_list_dicts(elements):
-    return list(map(lambda x: dict(x), elements))
+# Must be incremented every time the layout of stored preferences changes
+_preferences_format = 1
 
-def remove_duplicate_dicts_in_list(list_dict):
-    return convert_elements_to_list_dicts(list(OrderedDict((tuple(sorted(d.items())), d) for d in list_dict).values()))
+def get_preferences_prefix(username=None):
+    if not username:
+        return 'Software/BaseALT/Policies/Preferences/Machine'
+    return f'Software/BaseALT/Policies/Preferences/{username}'
+
+def serialize_preference(preference):
+    '''
+    Serialize preference object to compact JSON. Returns the key of
+    the object (hash of its contents) along with the JSON string.
+    '''
+    data = json.dumps(dict(preference), sort_keys=True, separators=(',', ':'),
+                      ensure_ascii=False, default=str)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()[:16], data
+
+def preferences_to_dict(preferences):
+    '''
+    Build dconf section with one key per unique preference object.
+    '''
+    section = dict()
+    for preference in preferences:
+        key, data = serialize_preference(preference)
+        # Escape backslashes for GVariant text format like clean_data()
+        section.setdefault(key, data.replace('\\', '\\\\'))
+    return section
 
 def add_preferences_to_global_registry_dict(username, is_machine):
-    if is_machine:
-        prefix = 'Software/BaseALT/Policies/Preferences/Machine'
-    else:
-        prefix = f'Software/BaseALT/Policies/Preferences/{username}'
-
-    preferences_global = [('Shortcuts',remove_duplicate_dicts_in_list(Dconf_registry.shortcuts)),
-                            ('Folders',remove_duplicate_dicts_in_list(Dconf_registry.folders)),
-                            ('Files',remove_duplicate_dicts_in_list(Dconf_registry.files)),
-                            ('Drives',remove_duplicate_dicts_in_list(Dconf_registry.drives)),
-                            ('Scheduledtasks',remove_duplicate_dicts_in_list(Dconf_registry.scheduledtasks)),
-                            ('Environmentvariables',remove_duplicate_dicts_in_list(Dconf_registry.environmentvariables)),
-                            ('Inifiles',remove_duplicate_dicts_in_list(Dconf_registry.inifiles)),
-                            ('Services',remove_duplicate_dicts_in_list(Dconf_registry.services)),
-                            ('Printers',remove_duplicate_dicts_in_list(Dconf_registry.printers)),
-                            ('Scripts',remove_duplicate_dicts_in_list(Dconf_registry.scripts)),
-                            ('Networkshares',remove_duplicate_dicts_in_list(Dconf_registry.networkshares))]
+    prefix = get_preferences_prefix(None if is_machine else username)
+
+    preferences_global = [('Shortcuts', Dconf_registry.shortcuts),
+                            ('Folders', Dconf_registry.folders),
+                            ('Files', Dconf_registry.files),
+                            ('Drives', Dconf_registry.drives),
+                            ('Scheduledtasks', Dconf_registry.scheduledtasks),
+                            ('Environmentvariables', Dconf_registry.environmentvariables),
+                            ('Inifiles', Dconf_registry.inifiles),
+                            ('Services', Dconf_registry.services),
+                            ('Printers', Dconf_registry.printers),
+                            ('Scripts', Dconf_registry.scripts),
+                            ('Networkshares', Dconf_registry.networkshares)]
 
     preferences_global_dict = dict()
-    preferences_global_dict[prefix] = dict()
+    preferences_global_dict[prefix] = dict({'Version': _preferences_format})
 
     for key, val in preferences_global:
-        preferences_global_dict[prefix].update({key:clean_data(str(val))})
+        section = preferences_to_dict(val)
+        if section:
+            preferences_global_dict['{}/{}'.format(prefix, key)] = section
 
     update_dict(Dconf_registry.global_registry_dict, preferences_global_dict)
 
@@ -0,0 +1,171 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2019-2024 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import re
+
+
+_separators = re.compile(r'\\|/')
+
+
+def split_path(path):
+    '''
+    Split registry path by both slash and backslash and normalize
+    components for case-insensitive comparison.
+    '''
+    return [part.lower() for part in _separators.split(path) if part]
+
+
+class trie_node:
+    __slots__ = ('children', 'sections')
+
+    def __init__(self):
+        self.children = dict()
+        self.sections = list()
+
+
+class tracked_dict(dict):
+    '''
+    Dictionary which records keys added to it and counts removals, so
+    index over it is updated only with new sections instead of
+    comparing all of them on every query.
+    '''
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.added = list(self)
+        self.removals = 0
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            self.added.append(key)
+        super().__setitem__(key, value)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self.added.append(key)
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.removals += 1
+
+    def pop(self, key, *default):
+        if key in self:
+            self.removals += 1
+        return super().pop(key, *default)
+
+    def popitem(self):
+        item = super().popitem()
+        self.removals += 1
+        return item
+
+    def clear(self):
+        super().clear()
+        self.removals += 1
+
+
+class registry_index:
+    '''
+    Case-insensitive prefix tree over the sections (top-level keys)
+    of tracked_dict. Section contents are not copied into the
+    tree and are read at query time, so updates of values inside
+    already indexed sections are visible without reindexing.
+    '''
+    def __init__(self, registry_dict):
+        self.registry_dict = registry_dict
+        self.rebuild()
+
+    def rebuild(self):
+        self.root = trie_node()
+        self.order = dict()
+        self.added = len(self.registry_dict.added)
+        self.removals = self.registry_dict.removals
+        for section in self.registry_dict:
+            self.add_section(section)
+
+    def sync(self):
+        '''
+        Bring the index up to date with registry dictionary. Sections
+        added since the last call are appended to the tree, removal of
+        any section rebuilds it.
+        '''
+        if self.removals != self.registry_dict.removals:
+            self.rebuild()
+            return
+        added = self.registry_dict.added
+        for section in added[self.added:]:
+            self.add_section(section)
+        self.added = len(added)
+
+    def add_section(self, section):
+        node = self.root
+        for part in split_path(section):
+            node = node.children.setdefault(part, trie_node())
+        node.sections.append(section)
+        self.order[section] = len(self.order)
+
+    def _section_entries(self, section):
+        from storage.dconf_registry import flatten_dictionary
+
+        value = self.registry_dict.get(section)
+        if isinstance(value, dict):
+            for key, data in flatten_dictionary(value).items():
+                yield '{}/{}'.format(section, key), key, data
+        else:
+            yield section, None, value
+
+    def filter(self, startswith):
+        '''
+        Get flattened entries whose path starts with startswith.
+        '''
+        prefix = split_path(startswith)
+        partial = list()
+        node = self.root
+        for depth, part in enumerate(prefix):
+            # Sections ending here may still match by their value names
+            for section in node.sections:
+                partial.append((section, prefix[depth:]))
+            node = node.children.get(part)
+            if node is None:
+                break
+
+        matched = list()
+        if node is not None:
+            stack = [node]
+            while stack:
+                current = stack.pop()
+                matched.extend((section, None) for section in current.sections)
+                stack.extend(current.children.values())
+        matched.extend(partial)
+        matched.sort(key=lambda item: self.order[item[0]])
+
+        result = dict()
+        for section, rest in matched:
+            for flat_key, key, data in self._section_entries(section):
+                if rest is None or (key is not None
+                                    and split_path(key)[:len(rest)] == rest):
+                    result[flat_key] = data
+        return result
+
@@ -0,0 +1,246 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2019-2024 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+Benchmark of parse -> merge -> save pipeline on generated SYSVOL.
+
+Run from gpoa directory:
+
+    python3 -m test.benchmark --gpos 60 --entries 2000 --preferences 200 --output results.json
+'''
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import unittest.mock
+
+from .sysvol import generate_sysvol
+
+
+_benchmark_user = 'benchmark'
+_benchmark_sid = 'S-1-5-21-0-0-0-1000'
+_preference_lists = [
+      'shortcuts'
+    , 'folders'
+    , 'files'
+    , 'drives'
+    , 'scheduledtasks'
+    , 'environmentvariables'
+    , 'inifiles'
+    , 'services'
+    , 'printers'
+    , 'scripts'
+    , 'networkshares'
+]
+
+
+def parse_arguments():
+    arguments = argparse.ArgumentParser(description='Benchmark GPT processing pipeline')
+    arguments.add_argument('--gpos', type=int, default=20,
+        help='Number of generated GPOs')
+    arguments.add_argument('--entries', type=int, default=500,
+        help='Number of Registry.pol entries per GPO part')
+    arguments.add_argument('--preferences', type=int, default=50,
+        help='Number of items in every Files.xml, Shortcuts.xml and Drives.xml')
+    arguments.add_argument('--repeat', type=int, default=5,
+        help='Number of measured runs')
+    arguments.add_argument('--label', default=None,
+        help='Label of the results, for example release version')
+    arguments.add_argument('--workdir', default=None,
+        help='Directory for generated SYSVOL (temporary by default)')
+    arguments.add_argument('--output', default=None,
+        help='Path to the JSON file with results (stdout by default)')
+    return arguments.parse_args()
+
+
+class _completed_process:
+    returncode = 0
+    stdout = ''
+    stderr = ''
+
+    def communicate(self, *args, **kwargs):
+        return ('', '')
+
+    def wait(self, *args, **kwargs):
+        return 0
+
+
+def stub_system_commands():
+    '''
+    Replace process spawning with no-op so the benchmark neither
+    changes the system nor measures external tools.
+    '''
+    stubs = [
+          unittest.mock.patch.object(subprocess, 'run', return_value=_completed_process())
+        , unittest.mock.patch.object(subprocess, 'Popen', return_value=_completed_process())
+        , unittest.mock.patch.object(subprocess, 'call', return_value=0)
+        , unittest.mock.patch.object(subprocess, 'check_call', return_value=0)
+        , unittest.mock.patch.object(subprocess, 'check_output', return_value=b'')
+    ]
+    for stub in stubs:
+        stub.start()
+    return stubs
+
+
+def reset_registry(Dconf_registry):
+    Dconf_registry.wipe_hklm()
+    Dconf_registry._gpo_name = set()
+    Dconf_registry._registry_index = None
+    for name in _preference_lists:
+        getattr(Dconf_registry, name).clear()
+
+
+class stopwatch:
+    def __init__(self):
+        self.results = dict()
+
+    def measure(self, stage, function, *args, **kwargs):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        self.results.setdefault(stage, list()).append(time.perf_counter() - start)
+        return result
+
+    def summary(self):
+        summary = dict()
+        for stage, runs in self.results.items():
+            summary[stage] = {
+                  'min': min(runs)
+                , 'median': statistics.median(runs)
+                , 'mean': statistics.mean(runs)
+                , 'runs': runs
+            }
+        return summary
+
+
+def run_pipeline(watch, gpt_list, dconf_dir, parse_cache_dir, cache_state):
+    '''
+    Run the pipeline once. Cold run starts with empty cache of parsed
+    GPT files, warm run reuses the cache filled by the previous run.
+    '''
+    from gpt.gpt import gpt
+    from storage.dconf_registry import (
+          Dconf_registry
+        , add_preferences_to_global_registry_dict
+    )
+    from backend import save_dconf
+
+    reset_registry(Dconf_registry)
+    if cache_state == 'cold':
+        shutil.rmtree(parse_cache_dir, ignore_errors=True)
+        os.makedirs(parse_cache_dir)
+
+    def load_gpts(username):
+        gpts = list()
+        for gpt_path, name in gpt_list:
+            obj = gpt(gpt_path, _benchmark_sid, username)
+            obj.set_name(name)
+            gpts.append(obj)
+        return gpts
+
+    machine_gpts = watch.measure('gpt_scan_machine', load_gpts, None)
+    watch.measure('merge_machine_{}'.format(cache_state),
+                  lambda: [obj.merge_machine() for obj in machine_gpts])
+
+    user_gpts = watch.measure('gpt_scan_user', load_gpts, _benchmark_user)
+    watch.measure('merge_user_{}'.format(cache_state),
+                  lambda: [obj.merge_user() for obj in user_gpts])
+
+    watch.measure('filter_hklm_entries', Dconf_registry.filter_hklm_entries,
+                  'Software/BaseALT/Policies/Benchmark/')
+    watch.measure('add_preferences', add_preferences_to_global_registry_dict, None, True)
+
+    db_file = os.path.join(dconf_dir, 'policy')
+    for path in os.listdir(dconf_dir):
+        os.unlink(os.path.join(dconf_dir, path))
+    with unittest.mock.patch('backend.get_dconf_db_file', return_value=db_file), \
+         unittest.mock.patch('backend.get_dconf_config_path', return_value=dconf_dir), \
+         unittest.mock.patch('backend.get_dconf_config_file',
+                             return_value=os.path.join(dconf_dir, 'policy.ini')):
+        watch.measure('save_dconf', save_dconf, _benchmark_user, True)
+        watch.measure('save_dconf_unchanged', save_dconf, _benchmark_user, True)
+
+    return {
+          'registry_sections': len(Dconf_registry.global_registry_dict)
+        , 'dconf_db_size': os.path.getsize(db_file) if os.path.exists(db_file) else None
+    }
+
+
+def main():
+    args = parse_arguments()
+    logging.getLogger().setLevel(logging.ERROR)
+    stubs = stub_system_commands()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        workdir = args.workdir or tmpdir
+        dconf_dir = os.path.join(tmpdir, 'dconf')
+        os.makedirs(dconf_dir)
+        # Keep parsed GPTs away from the system cache
+        parse_cache_dir = os.path.join(tmpdir, 'parsed-gpt')
+        cache_patch = unittest.mock.patch('gpt.parse_cache.parsed_gpt_cache_dir',
+                                          return_value=parse_cache_dir)
+        cache_patch.start()
+
+        start = time.perf_counter()
+        gpt_list = generate_sysvol(os.path.join(workdir, 'sysvol'),
+                                   args.gpos, args.entries, args.preferences)
+        generation_time = time.perf_counter() - start
+
+        watch = stopwatch()
+        for _ in range(args.repeat):
+            for cache_state in ('cold', 'warm'):
+                stats = run_pipeline(watch, gpt_list, dconf_dir, parse_cache_dir, cache_state)
+        cache_patch.stop()
+
+    for stub in stubs:
+        stub.stop()
+
+    report = {
+          'label': args.label
+        , 'timestamp': datetime.datetime.now().isoformat(timespec='seconds')
+        , 'python': platform.python_version()
+        , 'platform': platform.platform()
+        , 'parameters': {
+              'gpos': args.gpos
+            , 'entries': args.entries
+            , 'preferences': args.preferences
+            , 'repeat': args.repeat
+        }
+        , 'generation_time': generation_time
+        , 'stats': stats
+        , 'results': watch.summary()
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
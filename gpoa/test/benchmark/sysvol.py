@@ -0,0 +1,172 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2019-2024 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import struct
+import uuid
+from xml.sax.saxutils import quoteattr
+
+
+REG_SZ = 1
+REG_DWORD = 4
+
+_files_clsid = '{215B2E53-57CE-475c-80FE-9EEC14635851}'
+_file_clsid = '{50BE44C8-567A-4ed1-B1D0-9234FE1F38AF}'
+_shortcuts_clsid = '{872ECB34-B2EC-401b-A585-D32574AA90EE}'
+_shortcut_clsid = '{4F2F7C55-2790-433e-8127-0739D1CFA327}'
+_drives_clsid = '{8FDDCC1A-0C3C-43cd-A6B4-71A6DF20DA8C}'
+_drive_clsid = '{935D1B74-9CB8-4e3c-9914-7DD559B7A417}'
+_cpassword = 'gMrKqL3HLUTDLNNANgg3Xd6r6tR/gKSY4CDl5CEosFM'
+
+
+def preg_string(value):
+    return '{}\0'.format(value).encode('utf-16-le')
+
+
+def preg_entry(keyname, valuename, value_type, data):
+    '''
+    Serialize single PReg entry.
+    '''
+    if value_type == REG_DWORD:
+        raw = struct.pack('<I', data)
+    else:
+        raw = preg_string(data)
+    separator = ';'.encode('utf-16-le')
+    return b''.join([
+          '['.encode('utf-16-le')
+        , preg_string(keyname), separator
+        , preg_string(valuename), separator
+        , struct.pack('<I', value_type), separator
+        , struct.pack('<I', len(raw)), separator
+        , raw
+        , ']'.encode('utf-16-le')
+    ])
+
+
+def registry_entries(gpo_index, count):
+    '''
+    Generate registry values of the GPO. Every fourth value is shared
+    by all GPOs to exercise precedence, every tenth value is the item
+    of the list.
+    '''
+    for n in range(count):
+        keyname = 'Software\\BaseALT\\Policies\\Benchmark\\Key{}'.format(n // 20)
+        if n % 10 == 9:
+            data = 'item-{}-{}'.format(gpo_index, n)
+            yield 'Software\\BaseALT\\Policies\\Benchmark\\List{}'.format(n // 100), data, REG_SZ, data
+        elif n % 4 == 0:
+            yield keyname, 'Shared{}'.format(n), REG_DWORD, gpo_index
+        elif n % 2:
+            yield keyname, 'String{}'.format(n), REG_SZ, 'C:\\Data\\gpo{}\\value{}'.format(gpo_index, n)
+        else:
+            yield keyname, 'Number{}'.format(n), REG_DWORD, n
+
+
+def write_registry_pol(path, entries):
+    with open(path, 'wb') as f:
+        f.write(b'PReg' + struct.pack('<I', 1))
+        for keyname, valuename, value_type, data in entries:
+            f.write(preg_entry(keyname, valuename, value_type, data))
+
+
+def _item_uid(gpo_index, kind, n):
+    return '{{{}}}'.format(str(uuid.uuid5(uuid.NAMESPACE_OID,
+        '{}-{}-{}'.format(gpo_index, kind, n))).upper())
+
+
+def files_xml(gpo_index, count):
+    items = list()
+    for n in range(count):
+        items.append(
+            '<File clsid="{}" name="file{}.ini" status="file{}.ini" image="1" '
+            'changed="2024-01-01 00:00:00" uid="{}"><Properties action="U" '
+            'fromPath={} targetPath={} readOnly="0" archive="1" hidden="0" '
+            'suppress="0"/></File>'.format(_file_clsid, n, n,
+                _item_uid(gpo_index, 'file', n),
+                quoteattr('\\\\dc\\share\\gpo{}\\file{}.ini'.format(gpo_index, n)),
+                quoteattr('/etc/benchmark/file{}.ini'.format(n))))
+    return '<Files clsid="{}">{}</Files>'.format(_files_clsid, ''.join(items))
+
+
+def shortcuts_xml(gpo_index, count):
+    items = list()
+    for n in range(count):
+        items.append(
+            '<Shortcut clsid="{}" name="Link{}" status="Link{}" image="1" '
+            'removePolicy="1" userContext="0" bypassErrors="0" '
+            'changed="2024-01-01 00:00:00" uid="{}"><Properties pidl="" '
+            'targetType="FILESYSTEM" action="U" comment="Link {}" shortcutKey="0" '
+            'startIn="" arguments="" iconIndex="0" targetPath={} iconPath="" '
+            'window="" shortcutPath={}/></Shortcut>'.format(_shortcut_clsid, n, n,
+                _item_uid(gpo_index, 'shortcut', n), n,
+                quoteattr('C:\\Program Files\\App{}\\app.exe'.format(n)),
+                quoteattr('%DesktopDir%\\Link{}'.format(n))))
+    return '<Shortcuts clsid="{}">{}</Shortcuts>'.format(_shortcuts_clsid, ''.join(items))
+
+
+def drives_xml(gpo_index, count):
+    items = list()
+    for n in range(count):
+        items.append(
+            '<Drive clsid="{}" name="D{}" status="D{}" image="0" '
+            'changed="2024-01-01 00:00:00" uid="{}"><Properties action="U" '
+            'thisDrive="SHOW" allDrives="NOCHANGE" userName="user" path={} '
+            'label="Share {}" persistent="0" useLetter="0" letter="" '
+            'cpassword="{}"/></Drive>'.format(_drive_clsid, n, n,
+                _item_uid(gpo_index, 'drive', n),
+                quoteattr('\\\\dc\\share{}'.format(n)), n, _cpassword))
+    return '<Drives clsid="{}">{}</Drives>'.format(_drives_clsid, ''.join(items))
+
+
+_preferences = [
+      ('Files', files_xml)
+    , ('Shortcuts', shortcuts_xml)
+    , ('Drives', drives_xml)
+]
+
+
+def write_gpt(gpt_path, gpo_index, entries, preferences):
+    '''
+    Write GPT with Registry.pol and preferences for both Machine and
+    User parts.
+    '''
+    for part in ['Machine', 'User']:
+        part_path = os.path.join(gpt_path, part)
+        os.makedirs(part_path, exist_ok=True)
+        write_registry_pol(os.path.join(part_path, 'Registry.pol'),
+                           registry_entries(gpo_index, entries))
+        for name, generator in _preferences:
+            pref_dir = os.path.join(part_path, 'Preferences', name)
+            os.makedirs(pref_dir, exist_ok=True)
+            with open(os.path.join(pref_dir, '{}.xml'.format(name)), 'w') as f:
+                f.write('<?xml version="1.0" encoding="utf-8"?>\n')
+                f.write(generator(gpo_index, preferences))
+
+
+def generate_sysvol(root, gpos, entries, preferences):
+    '''
+    Generate SYSVOL-like directory with the specified number of GPTs.
+    Returns the list of (GPT path, GPO name) in link order.
+    '''
+    gpts = list()
+    for gpo_index in range(gpos):
+        guid = _item_uid(gpo_index, 'gpo', 0)
+        gpt_path = os.path.join(root, 'Policies', guid)
+        write_gpt(gpt_path, gpo_index, entries, preferences)
+        gpts.append((gpt_path, 'Benchmark GPO {}'.format(gpo_index)))
+    return gpts
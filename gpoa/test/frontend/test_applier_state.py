@@ -0,0 +1,136 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2019-2024 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pathlib
+import tempfile
+import unittest
+import unittest.mock
+
+import util.paths
+
+
+class fake_storage:
+    def __init__(self):
+        self.registry = dict()
+        self.folders = list()
+
+    def filter_entries(self, startswith):
+        return {key: value for key, value in self.registry.items() if key.startswith(startswith)}
+
+
+class ApplierStateTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        patcher = unittest.mock.patch('util.paths.cache_dir',
+                                      return_value=pathlib.Path(self.tmpdir.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        from frontend.applier_frontend import applier_inputs
+        self.storage = fake_storage()
+        self.storage.registry['Software/BaseALT/Policies/Control/sshd-gssapi-auth'] = 'enabled'
+        self.inputs = applier_inputs(branches=['Software/BaseALT/Policies/Control'])
+
+    def run_applier(self, **kwargs):
+        from frontend.applier_state import applier_state
+
+        state = applier_state(self.storage, **kwargs)
+        skipped = state.is_unchanged('control', self.inputs)
+        if not skipped:
+            state.update('control', self.inputs)
+        state.save()
+        return skipped
+
+    def test_unchanged_inputs(self):
+        self.assertFalse(self.run_applier())
+        self.assertTrue(self.run_applier())
+
+        self.storage.registry['Software/BaseALT/Policies/Control/sshd-gssapi-auth'] = 'disabled'
+        self.assertFalse(self.run_applier())
+        self.assertTrue(self.run_applier())
+
+    def test_full_apply(self):
+        self.assertFalse(self.run_applier())
+        self.assertFalse(self.run_applier(force=True))
+        self.assertFalse(self.run_applier(full_apply_interval=0))
+
+    def test_outputs_drift(self):
+        from frontend.applier_frontend import applier_inputs
+
+        output = pathlib.Path(self.tmpdir.name, 'output.conf')
+        output.write_text('policy')
+        self.inputs = applier_inputs(branches=['Software/BaseALT/Policies/Control'],
+                                     outputs=[str(output)])
+        self.assertFalse(self.run_applier())
+        self.assertTrue(self.run_applier())
+
+        output.unlink()
+        self.assertFalse(self.run_applier())
+
+    def test_logged_error(self):
+        '''
+        Applier which logged an error instead of raising it is not
+        skipped on the next run.
+        '''
+        from frontend.applier_state import applier_state
+        from frontend.frontend_manager import frontend_manager
+        from util.logging import log
+
+        class failing_applier:
+            inputs = self.inputs
+            def apply(self):
+                log('E55', dict({'msg': 'Installation failed'}))
+
+        class applier:
+            inputs = self.inputs
+            def apply(self):
+                pass
+
+        for applier_object, skipped in ((failing_applier(), False), (applier(), True)):
+            state = applier_state(self.storage)
+            frontend_manager._machine_applier_apply(None, state, 'control', applier_object)
+            state.save()
+            state = applier_state(self.storage)
+            self.assertEqual(state.is_unchanged('control', self.inputs), skipped)
+
+    def test_background_packages(self):
+        '''
+        Appliers do not wait for package applier which only starts
+        installation in background.
+        '''
+        from frontend.frontend_manager import frontend_manager
+
+        class package_applier:
+            inputs = self.inputs
+            def __init__(self, flagSync):
+                self.flagSync = flagSync
+
+        self.storage._force = False
+        for flagSync in (True, False):
+            manager = frontend_manager.__new__(frontend_manager)
+            manager.storage = self.storage
+            manager.config = unittest.mock.Mock()
+            manager.config.get_full_apply_interval.return_value = 0
+            manager.machine_appliers = dict({'package': package_applier(flagSync)})
+            with unittest.mock.patch('frontend.frontend_manager.is_root', return_value=True), \
+                    unittest.mock.patch('frontend.frontend_manager.run_appliers') as run_appliers:
+                manager.machine_apply()
+            dependencies = run_appliers.call_args[0][2]
+            self.assertEqual('package' in dependencies['cups'], flagSync)
+            self.assertEqual(dependencies['files'], ('folders',))
@@ -0,0 +1,77 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2019-2024 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import pathlib
+import tempfile
+import unittest
+import unittest.mock
+
+import util.paths
+
+
+class GptParseCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        patcher = unittest.mock.patch('util.paths.cache_dir',
+                                      return_value=pathlib.Path(self.tmpdir.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.path = os.path.join(self.tmpdir.name, 'Registry.pol')
+        with open(self.path, 'w') as f:
+            f.write('policy')
+        self.calls = 0
+
+    def parser(self, path):
+        self.calls += 1
+        with open(path) as f:
+            return [f.read()]
+
+    def test_cached(self):
+        from gpt.parse_cache import parse_cached
+
+        self.assertEqual(parse_cached(self.path, self.parser, ('guid', '1')), ['policy'])
+        self.assertEqual(parse_cached(self.path, self.parser, ('guid', '1')), ['policy'])
+        self.assertEqual(self.calls, 1)
+
+    def test_invalidation(self):
+        from gpt.parse_cache import parse_cached
+
+        parse_cached(self.path, self.parser, ('guid', '1'))
+        parse_cached(self.path, self.parser, ('guid', '2'))
+        self.assertEqual(self.calls, 2)
+
+        with open(self.path, 'w') as f:
+            f.write('changed policy')
+        self.assertEqual(parse_cached(self.path, self.parser, ('guid', '2')), ['changed policy'])
+        self.assertEqual(self.calls, 3)
+
+        parse_cached(self.path, self.parser, ('guid', '2'), refresh=True)
+        self.assertEqual(self.calls, 4)
+
+    def test_corrupted(self):
+        from gpt.parse_cache import parse_cached, _cache_file
+
+        parse_cached(self.path, self.parser, ('guid', '1'))
+        with open(_cache_file(self.path), 'wb') as f:
+            f.write(b'garbage')
+        self.assertEqual(parse_cached(self.path, self.parser, ('guid', '1')), ['policy'])
+        self.assertEqual(self.calls, 2)
+
@@ -0,0 +1,64 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2019-2024 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import os
+import time
+import unittest
+import unittest.mock
+
+
+class storage_stub:
+    _force = False
+
+
+class gpt_stub:
+    def __init__(self, name):
+        self.settings = dict({'machine': name})
+        self.storage = storage_stub()
+
+    def cache_key(self):
+        return None
+
+
+class GptParseTestCase(unittest.TestCase):
+    def test_hung_worker(self):
+        '''
+        Worker which does not answer in time does not block the
+        refresh, GPTs are parsed sequentially instead.
+        '''
+        import gpt.gpt
+
+        parent = os.getpid()
+
+        def parse_settings(settings, cache_key=None, refresh=False):
+            if os.getpid() != parent:
+                time.sleep(60)
+            return settings
+
+        gpts = [gpt_stub('first'), gpt_stub('second')]
+        with unittest.mock.patch('gpt.gpt.parse_settings', parse_settings), \
+                unittest.mock.patch('gpt.gpt._parse_timeout', 0.5):
+            start = time.monotonic()
+            self.assertEqual(list(gpt.gpt.parse_gpts(gpts, 'machine', 2)),
+                             ['first', 'second'])
+        self.assertLess(time.monotonic() - start, 30)
+
+
+if __name__ == '__main__':
+    unittest.main()
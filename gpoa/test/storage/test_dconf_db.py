@@ -0,0 +1,137 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2019-2024 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+from storage.dconf_db import load_gvdb_table, read_dconf_locks, write_dconf_db
+
+
+class DconfDbWriterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.registry = dict()
+        self.registry['Software/BaseALT/Policies/gsettings'] = {
+              'org.mate.background.picture-filename': '\\\\\\\\server\\\\share\\\\wallpaper.png'
+            , 'org.mate.screensaver.lock-enabled': 1
+        }
+        self.registry['Software/BaseALT/Policies/Chromium'] = {
+            'HomepageLocation': 'about:blank'
+        }
+
+    def test_roundtrip(self):
+        '''
+        Database written without "dconf compile" is readable by GVDB
+        and keeps the values as the keyfile would.
+        '''
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_file = os.path.join(tmpdir, 'policy')
+            write_dconf_db(db_file, self.registry)
+            table = load_gvdb_table(db_file)
+
+        self.assertEqual(
+              table.get_value('/Software/BaseALT/Policies/gsettings/org.mate.background.picture-filename').get_string()
+            , '\\\\server\\share\\wallpaper.png')
+        self.assertEqual(
+              table.get_value('/Software/BaseALT/Policies/gsettings/org.mate.screensaver.lock-enabled').get_int32()
+            , 1)
+        self.assertEqual(
+              table.get_value('/Software/BaseALT/Policies/Chromium/HomepageLocation').get_string()
+            , 'about:blank')
+        self.assertIn('/Software/BaseALT/Policies/', table.get_names())
+
+    def test_replace(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_file = os.path.join(tmpdir, 'policy')
+            write_dconf_db(db_file, self.registry)
+            write_dconf_db(db_file, {'Software/BaseALT/Policies/Chromium': {'HomepageLocation': 'about:home'}})
+            table = load_gvdb_table(db_file)
+            self.assertEqual(sorted(os.listdir(tmpdir)), ['policy', 'policy.sha256'])
+
+        self.assertIsNone(table.get_value('/Software/BaseALT/Policies/gsettings/org.mate.screensaver.lock-enabled'))
+        self.assertEqual(
+              table.get_value('/Software/BaseALT/Policies/Chromium/HomepageLocation').get_string()
+            , 'about:home')
+
+    def test_unchanged(self):
+        '''
+        Database is not rewritten when the policy is the same.
+        '''
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_file = os.path.join(tmpdir, 'policy')
+            self.assertTrue(write_dconf_db(db_file, self.registry))
+            inode = os.stat(db_file).st_ino
+            self.assertFalse(write_dconf_db(db_file, self.registry))
+            self.assertEqual(os.stat(db_file).st_ino, inode)
+
+            os.unlink(db_file)
+            self.assertTrue(write_dconf_db(db_file, self.registry))
+
+    def test_keyfile_unchanged(self):
+        '''
+        Neither keyfile nor database is rewritten when the policy is
+        the same.
+        '''
+        import backend
+        from storage.dconf_registry import Dconf_registry
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            keyfile = os.path.join(tmpdir, 'policy.d', 'policy.ini')
+            db_file = os.path.join(tmpdir, 'policy')
+            with unittest.mock.patch('backend.get_dconf_config_file', return_value=keyfile), \
+                    unittest.mock.patch('backend.get_dconf_db_file', return_value=db_file), \
+                    unittest.mock.patch('backend.get_dconf_config_path',
+                                        return_value=os.path.dirname(keyfile)), \
+                    unittest.mock.patch('backend.add_preferences_to_global_registry_dict'), \
+                    unittest.mock.patch.object(Dconf_registry, 'apply_template'), \
+                    unittest.mock.patch.object(Dconf_registry, 'global_registry_dict', self.registry), \
+                    unittest.mock.patch('backend.create_dconf_ini_file',
+                                        wraps=backend.create_dconf_ini_file) as create_ini:
+                backend.save_dconf('machine', True)
+                self.assertTrue(os.path.exists(keyfile))
+                inode = os.stat(db_file).st_ino
+                backend.save_dconf('machine', True)
+                self.assertEqual(create_ini.call_count, 1)
+                self.assertEqual(os.stat(db_file).st_ino, inode)
+
+                # Removed keyfile is restored
+                os.unlink(keyfile)
+                backend.save_dconf('machine', True)
+                self.assertTrue(os.path.exists(keyfile))
+
+    def test_locks(self):
+        '''
+        Keys listed in lock files are stored in ".locks" table, as
+        "dconf compile" does.
+        '''
+        lock = '/Software/BaseALT/Policies/gsettings/org.mate.screensaver.lock-enabled'
+        with tempfile.TemporaryDirectory() as tmpdir:
+            os.makedirs(os.path.join(tmpdir, 'policy.d', 'locks'))
+            with open(os.path.join(tmpdir, 'policy.d', 'locks', 'policy'), 'w') as f:
+                f.write('# GSettings locks\n{}\n\n'.format(lock))
+            locks = read_dconf_locks(os.path.join(tmpdir, 'policy.d'))
+            self.assertEqual(locks, [lock])
+
+            db_file = os.path.join(tmpdir, 'policy')
+            write_dconf_db(db_file, self.registry, locks)
+            table = load_gvdb_table(db_file)
+
+        self.assertTrue(table.get_table('.locks').has_value(lock))
+        self.assertEqual(table.get_value(lock).get_int32(), 1)
+
@@ -0,0 +1,106 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2019-2024 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import json
+import unittest
+
+from gpt.drives import drivemap
+from gpt.envvars import envvar
+from storage.dconf_registry import (
+      Dconf_registry
+    , add_preferences_to_global_registry_dict
+    , preference_set
+    , preferences_to_dict
+)
+
+
+def make_drive(letter, path, policy_name, use_letter='1'):
+    drive = drivemap()
+    drive.set_dir(letter)
+    drive.set_path(path)
+    drive.set_useLetter(use_letter)
+    drive.policy_name = policy_name
+    return drive
+
+
+class PreferencesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.registry_dict = Dconf_registry.global_registry_dict
+        Dconf_registry.global_registry_dict = dict()
+        Dconf_registry.environmentvariables.clear()
+        Dconf_registry.drives.clear()
+
+    def tearDown(self):
+        Dconf_registry.global_registry_dict = self.registry_dict
+        Dconf_registry.environmentvariables.clear()
+        Dconf_registry.drives.clear()
+
+    def test_roundtrip(self):
+        '''
+        Stored JSON unescaped the way dconf database writer does gives
+        back the attributes of preference object.
+        '''
+        variable = envvar('PATH', 'C:\\Tools;"%HOME%"', 'U')
+        variable.policy_name = 'Test Policy'
+
+        section = preferences_to_dict([variable, variable])
+        self.assertEqual(len(section), 1)
+
+        stored = list(section.values())[0].replace('\\\\', '\\')
+        self.assertEqual(json.loads(stored), dict(variable))
+
+    def test_sections(self):
+        variable = envvar('PATH', '/usr/bin', 'U')
+        variable.policy_name = 'Test Policy'
+        Dconf_registry.environmentvariables.add(variable)
+        add_preferences_to_global_registry_dict(None, True)
+
+        prefix = 'Software/BaseALT/Policies/Preferences/Machine'
+        self.assertEqual(Dconf_registry.global_registry_dict[prefix], {'Version': 1})
+        stored = list(Dconf_registry.global_registry_dict[prefix + '/Environmentvariables'].values())
+        self.assertEqual(json.loads(stored[0])['value'], '/usr/bin')
+
+    def test_last_policy_wins(self):
+        '''
+        Object merged later (from GPO with higher precedence) replaces
+        the one with the same identity and keeps the merge order.
+        '''
+        preferences = preference_set(lambda var: var.name)
+        for name, value, policy_name in [('PATH', '/usr/bin', 'First')
+                                         , ('EDITOR', 'vim', 'First')
+                                         , ('PATH', '/opt/bin', 'Second')]:
+            variable = envvar(name, value, 'U')
+            variable.policy_name = policy_name
+            preferences.add(variable)
+
+        self.assertEqual([(var.name, var.value, var.policy_name) for var in preferences],
+                         [('EDITOR', 'vim', 'First'), ('PATH', '/opt/bin', 'Second')])
+
+    def test_drive_letter_identity(self):
+        Dconf_registry.drives.add(make_drive('H', '\\\\server\\home', 'First'))
+        Dconf_registry.drives.add(make_drive('h', '\\\\server\\profiles', 'Second'))
+        Dconf_registry.drives.add(make_drive('S', '\\\\server\\share', 'First', '0'))
+        Dconf_registry.drives.add(make_drive('T', '\\\\server\\share', 'Second', '0'))
+
+        drives = Dconf_registry.get_drives(None)
+        self.assertEqual([(drive.path, drive.policy_name) for drive in drives], [
+              ('\\\\server\\profiles', 'Second')
+            , ('\\\\server\\share', 'Second')
+        ])
+
@@ -0,0 +1,122 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2019-2024 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+import unittest.mock
+
+from storage.registry_index import registry_index, tracked_dict
+
+
+class RegistryIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.registry = tracked_dict()
+        self.registry['Software/BaseALT/Policies/gsettings'] = {
+              'org.mate.background.picture-filename': 'wallpaper.png'
+            , 'org.mate.screensaver.lock-enabled': 1
+        }
+        self.registry['Software/BaseALT/Policies/GSettingsLocks'] = {
+            'org.mate.screensaver.lock-enabled': 1
+        }
+        self.registry['Software/BaseALT/Policies/Packages/Install'] = {
+            'Install': ['vim', 'mc']
+        }
+
+    def test_branch_filter(self):
+        '''
+        Branch query returns only the entries of the branch itself
+        and ignores the trailing separator.
+        '''
+        index = registry_index(self.registry)
+        result = index.filter('Software\\BaseALT\\Policies\\gsettings\\')
+
+        self.assertEqual(list(result.keys()), [
+              'Software/BaseALT/Policies/gsettings/org.mate.background.picture-filename'
+            , 'Software/BaseALT/Policies/gsettings/org.mate.screensaver.lock-enabled'
+        ])
+
+    def test_case_insensitive(self):
+        index = registry_index(self.registry)
+        result = index.filter('SOFTWARE/basealt/POLICIES/packages')
+
+        self.assertEqual(result, {
+            'Software/BaseALT/Policies/Packages/Install/Install': ['vim', 'mc']
+        })
+
+    def test_value_name_filter(self):
+        '''
+        Prefix may point to the value inside of the section.
+        '''
+        index = registry_index(self.registry)
+        result = index.filter('Software/BaseALT/Policies/GSettingsLocks/org.mate.screensaver.lock-enabled')
+
+        self.assertEqual(list(result.values()), [1])
+
+    def test_incremental_update(self):
+        index = registry_index(self.registry)
+        self.assertEqual(index.filter('Software/BaseALT/Policies/Chromium'), dict())
+
+        self.registry['Software/BaseALT/Policies/Chromium'] = {'HomepageLocation': 'about:blank'}
+        self.registry['Software/BaseALT/Policies/gsettings']['org.mate.session.idle-delay'] = 5
+        index.sync()
+
+        self.assertEqual(len(index.filter('Software/BaseALT/Policies/Chromium')), 1)
+        self.assertEqual(len(index.filter('Software/BaseALT/Policies/gsettings')), 3)
+        self.assertEqual(len(index.filter('Software/BaseALT/Policies')), 6)
+
+    def test_removed_section(self):
+        '''
+        Removal or re-adding of a section rebuilds the index instead of
+        keeping stale sections.
+        '''
+        index = registry_index(self.registry)
+        del self.registry['Software/BaseALT/Policies/GSettingsLocks']
+        gsettings = self.registry.pop('Software/BaseALT/Policies/gsettings')
+        self.registry['Software/BaseALT/Policies/gsettings'] = gsettings
+        self.registry['Software/BaseALT/Policies/Chromium'] = {'HomepageLocation': 'about:blank'}
+        index.sync()
+
+        self.assertEqual(index.filter('Software/BaseALT/Policies/GSettingsLocks'), dict())
+        self.assertEqual(list(index.filter('Software/BaseALT/Policies')), [
+              'Software/BaseALT/Policies/Packages/Install/Install'
+            , 'Software/BaseALT/Policies/gsettings/org.mate.background.picture-filename'
+            , 'Software/BaseALT/Policies/gsettings/org.mate.screensaver.lock-enabled'
+            , 'Software/BaseALT/Policies/Chromium/HomepageLocation'
+        ])
+
+    def test_sync_unchanged(self):
+        '''
+        Query without changes of the sections does not visit them.
+        '''
+        index = registry_index(self.registry)
+        self.registry['Software/BaseALT/Policies/gsettings']['org.mate.session.idle-delay'] = 5
+        with unittest.mock.patch.object(index, 'add_section') as add_section, \
+                unittest.mock.patch.object(index, 'rebuild') as rebuild:
+            index.sync()
+            self.registry.setdefault('Software/BaseALT/Policies/gsettings', dict())
+            index.sync()
+        add_section.assert_not_called()
+        rebuild.assert_not_called()
+
+    def test_explicit_dict(self):
+        from storage.dconf_registry import Dconf_registry
+
+        result = Dconf_registry.filter_entries('software/basealt/policies/GSettingsLocks%',
+                                               dict(self.registry))
+        self.assertEqual(result, {
+            'Software/BaseALT/Policies/GSettingsLocks/org.mate.screensaver.lock-enabled': 1
+        })
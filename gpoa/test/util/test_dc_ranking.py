@@ -0,0 +1,124 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2019-2024 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import pathlib
+import tempfile
+import threading
+import time
+import unittest
+import unittest.mock
+
+import util.paths
+
+
+class DcRankingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        patcher = unittest.mock.patch('util.paths.cache_dir',
+                                      return_value=pathlib.Path(self.tmpdir.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_probe_servers(self):
+        from util.dc_ranking import probe_servers
+
+        def probe(dc):
+            if dc == 'dc2':
+                raise RuntimeError('No answer')
+
+        latencies = probe_servers(['dc1', 'dc2', 'dc3'], probe)
+        self.assertEqual(sorted(latencies), ['dc1', 'dc2', 'dc3'])
+        self.assertIsNone(latencies['dc2'])
+        self.assertGreaterEqual(latencies['dc1'], 0)
+
+    def test_rank(self):
+        from util.dc_ranking import dc_latency_history
+
+        history = dc_latency_history()
+        history.update('slow', 0.5)
+        history.update('fast', 0.01)
+        history.update('down', None)
+        self.assertEqual(history.rank(['down', 'unknown', 'slow', 'fast']),
+                         ['fast', 'slow', 'unknown', 'down'])
+
+    def test_moving_average(self):
+        '''
+        Single slow answer does not outweigh the history kept between
+        runs.
+        '''
+        from util.dc_ranking import dc_latency_history
+
+        history = dc_latency_history()
+        for _ in range(5):
+            history.update('dc1', 0.01)
+            history.update('dc2', 0.02)
+        history.save()
+
+        history = dc_latency_history()
+        history.update('dc1', 0.03)
+        self.assertEqual(history.rank(['dc2', 'dc1']), ['dc1', 'dc2'])
+
+    def test_unreachable(self):
+        from util.dc_ranking import dc_latency_history
+
+        history = dc_latency_history()
+        history.update('dc1', None)
+        history.update('dc2', 0.01)
+        self.assertTrue(history.is_unreachable('dc1', 90))
+        self.assertFalse(history.is_unreachable('dc2', 90))
+        self.assertFalse(history.is_unreachable('dc3', 90))
+        self.assertFalse(history.is_unreachable('dc1', 0))
+
+        # Server answering again is not skipped
+        history.update('dc1', 0.02)
+        self.assertFalse(history.is_unreachable('dc1', 90))
+
+    def test_hedged_call(self):
+        from util.dc_ranking import hedged_call
+
+        answer = threading.Event()
+        self.addCleanup(answer.set)
+        dropped = list()
+
+        def request(dc, cancelled):
+            if dc == 'slow':
+                answer.wait()
+                if cancelled.is_set():
+                    dropped.append(dc)
+            if dc == 'down':
+                raise RuntimeError('No answer')
+            return dc.upper()
+
+        # Slow server is not waited for after the delay
+        self.assertEqual(hedged_call(['slow', 'fast'], request, 0.01),
+                         ('fast', 'FAST', []))
+        # Failure starts the next request without delay
+        self.assertEqual(hedged_call(['down', 'fast'], request, 60),
+                         ('fast', 'FAST', ['down']))
+        self.assertEqual(hedged_call(['down'], request, 0.01),
+                         (None, None, ['down']))
+
+        # Abandoned request sees it is cancelled
+        answer.set()
+        for _ in range(100):
+            if dropped:
+                break
+            time.sleep(0.01)
+        self.assertEqual(dropped, ['slow'])
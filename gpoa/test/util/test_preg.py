@@ -0,0 +1,85 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2019-2024 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+from util.preg import (
+      load_pol_preg
+    , parse_preg
+)
+
+
+def preg_string(value):
+    return value.encode('utf-16-le')
+
+def preg_entry(keyname, valuename, value_type, data):
+    return (preg_string('[{}\0;{}\0;'.format(keyname, valuename))
+            + value_type.to_bytes(4, 'little') + preg_string(';')
+            + len(data).to_bytes(4, 'little') + preg_string(';')
+            + data + preg_string(']'))
+
+
+class PRegTestCase(unittest.TestCase):
+    def test_load_pol(self):
+        entries = load_pol_preg('test/frontend/appliers/data/control_string.pol').entries
+
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0].keyname, 'Software\\BaseALT\\Policies\\Control')
+        self.assertEqual(entries[0].valuename, 'dvd-ram-control')
+        self.assertEqual(entries[0].data, 'restricted')
+
+    def test_value_types(self):
+        data = (b'PReg\x01\x00\x00\x00'
+            + preg_entry('Software\\Test', 'string', 1, preg_string('value\0'))
+            + preg_entry('Software\\Test', 'dword', 4, (5).to_bytes(4, 'little'))
+            + preg_entry('Software\\Test', 'qword', 11, (2**40).to_bytes(8, 'little'))
+            + preg_entry('Software\\Test', 'multi', 7, preg_string('a\0b\0\0')))
+
+        entries = {e.valuename: e for e in parse_preg(data)}
+
+        self.assertEqual(entries['string'].data, 'value')
+        self.assertEqual(entries['dword'].data, 5)
+        self.assertEqual(entries['qword'].data, 2**40)
+        self.assertEqual(entries['multi'].data, preg_string('a\0b\0\0'))
+
+    def test_malformed(self):
+        with self.assertRaises(ValueError):
+            list(parse_preg(b'PReg\x01\x00\x00\x00' + preg_string('[Software')))
+
+    def test_truncated_file_not_merged(self):
+        '''
+        Entries of truncated file are not merged even partially.
+        '''
+        from util.preg import merge_polfile
+
+        data = (b'PReg\x01\x00\x00\x00'
+            + preg_entry('Software\\Test', 'first', 1, preg_string('value\0'))
+            + preg_entry('Software\\Test', 'second', 4, (5).to_bytes(4, 'little')))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            polfile = os.path.join(tmpdir, 'Registry.pol')
+            with open(polfile, 'wb') as f:
+                f.write(data[:-6])
+
+            with unittest.mock.patch('util.preg.load_preg_dconf') as load_preg_dconf:
+                with self.assertRaises(ValueError):
+                    merge_polfile(polfile)
+                load_preg_dconf.assert_not_called()
+
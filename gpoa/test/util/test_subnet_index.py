@@ -0,0 +1,61 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2019-2024 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import ipaddress
+import unittest
+
+from util.subnet_index import subnet_index
+
+
+class SubnetIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.index = subnet_index([
+              (ipaddress.ip_network('10.0.0.0/8'), 'CN=Main')
+            , (ipaddress.ip_network('10.20.0.0/16'), 'CN=Branch')
+            , (ipaddress.ip_network('2001:db8::/32'), 'CN=Main')
+            , (ipaddress.ip_network('2001:db8:20::/48'), 'CN=Branch')
+        ])
+
+    def test_longest_prefix(self):
+        self.assertEqual(self.index.lookup('10.20.1.1')[1], 'CN=Branch')
+        self.assertEqual(self.index.lookup('10.21.1.1')[1], 'CN=Main')
+        self.assertEqual(self.index.lookup('2001:db8:20::5')[1], 'CN=Branch')
+        self.assertEqual(self.index.lookup('2001:db8:21::5')[1], 'CN=Main')
+        self.assertIsNone(self.index.lookup('192.168.1.1'))
+
+    def test_most_specific_address(self):
+        '''
+        Site is chosen by the most specific subnet among all host
+        addresses regardless of their order.
+        '''
+        addresses = [
+              ipaddress.ip_address('10.1.1.1')
+            , ipaddress.ip_address('192.168.1.1')
+            , ipaddress.ip_address('10.20.1.1')
+        ]
+        self.assertEqual(self.index.match(addresses), 'CN=Branch')
+        self.assertEqual(self.index.match(reversed(addresses)), 'CN=Branch')
+        self.assertIsNone(self.index.match([ipaddress.ip_address('127.0.0.1')]))
+
+    def test_persistence(self):
+        restored = subnet_index(self.index.items())
+
+        self.assertEqual(restored.items(), self.index.items())
+        self.assertEqual(restored.lookup('10.20.1.1')[1], 'CN=Branch')
+
@@ -0,0 +1,48 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2019-2024 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+import unittest.mock
+
+import util.timings
+from util.timings import enable_timings, get_timings, timed
+
+
+class TimingsTestCase(unittest.TestCase):
+    def setUp(self):
+        patcher = unittest.mock.patch.multiple(util.timings, _enabled=False, _records=list())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_disabled(self):
+        with timed('total'):
+            pass
+        self.assertEqual(get_timings(), list())
+
+    def test_nested(self):
+        enable_timings()
+        with timed('total'):
+            with self.assertRaises(ValueError):
+                with timed('applier_apply', 'ntp'):
+                    raise ValueError()
+
+        self.assertEqual([(record['phase'], record.get('name')) for record in get_timings()],
+                         [('applier_apply', 'ntp'), ('total', None)])
+        for record in get_timings():
+            self.assertGreaterEqual(record['wall'], 0)
+            self.assertGreaterEqual(record['cpu'], 0)
@@ -0,0 +1,69 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2019-2024 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import pathlib
+import tempfile
+import unittest
+import unittest.mock
+
+import util.paths
+
+
+class TopologyCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        patcher = unittest.mock.patch('util.paths.cache_dir',
+                                      return_value=pathlib.Path(self.tmpdir.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.topology = dict({
+              'pdc_emulator': 'dc1.example.test'
+            , 'subnets': [['10.0.0.0/8', 'CN=Site1']]
+            , 'site': 'CN=Site1'
+            , 'site_servers': ['dc1.example.test']
+            , 'all_servers': ['dc1.example.test', 'dc2.example.test']
+        })
+
+    def make_cache(self, realm='EXAMPLE.TEST', ttl=8, refresh=False):
+        from util.topology_cache import topology_cache
+
+        return topology_cache(realm, ttl, refresh)
+
+    def test_cached_topology(self):
+        self.make_cache().save(self.topology)
+
+        # Realm case is not significant
+        self.assertEqual(self.make_cache('example.test').load(), self.topology)
+        self.assertIsNone(self.make_cache(refresh=True).load())
+
+    def test_invalidation(self):
+        self.make_cache().save(self.topology)
+
+        self.assertIsNone(self.make_cache(realm='OTHER.TEST').load())
+
+        with unittest.mock.patch('time.time', return_value=2**40):
+            self.assertIsNone(self.make_cache().load())
+
+    def test_disabled(self):
+        self.make_cache(ttl=0).save(self.topology)
+
+        self.assertIsNone(self.make_cache().load())
+
@@ -0,0 +1,225 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2019-2024 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import itertools
+import pathlib
+import tempfile
+import threading
+import time
+import unittest
+import unittest.mock
+
+import util.paths
+
+
+class gpo_entry:
+    def __init__(self, name, display_name, version):
+        self.name = name
+        self.display_name = display_name
+        self.version = version
+        self.file_sys_path = '\\\\domain.alt\\sysvol\\{}'.format(name)
+
+
+class WindowsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        patcher = unittest.mock.patch('util.paths.cache_dir',
+                                      return_value=pathlib.Path(self.tmpdir.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = unittest.mock.patch('util.windows.GPConfig')
+        self.config = patcher.start()
+        self.config.return_value.get_hedge_delay.return_value = 0
+        self.addCleanup(patcher.stop)
+
+    def make_creds(self, answering=()):
+        '''
+        Create smbcreds without domain lookups. Only servers listed in
+        answering respond to CLDAP ping.
+        '''
+        from util.windows import smbcreds
+        from util.dc_ranking import dc_latency_history
+
+        def cldap_ping(dc):
+            if dc not in answering:
+                raise RuntimeError('No answer')
+
+        creds = smbcreds.__new__(smbcreds)
+        creds.lp = None
+        creds.creds = None
+        creds.dc_history = dc_latency_history()
+        creds.unreachable_dc_ttl = 10
+        creds.offline = False
+        creds.selected_dc = 'dc1'
+        creds.dc_site_servers = list()
+        creds.all_servers = list()
+        creds.pdc_emulator_server = 'pdc'
+        creds.cldap_ping = cldap_ping
+        return creds
+
+    def test_pdc_failure_raises(self):
+        '''
+        Empty GPO list must not be returned when PDC emulator fails,
+        it would remove all applied policies.
+        '''
+        from util.exceptions import GetGPOListFail
+
+        creds = self.make_creds()
+        with unittest.mock.patch('util.windows.samba.gpo.ADS_STRUCT') as ads:
+            ads.return_value.connect.return_value = False
+            with self.assertRaises(GetGPOListFail):
+                creds.get_gpos('user', dict(), 'pdc')
+
+    def test_cancelled_request(self):
+        creds = self.make_creds()
+        cancelled = threading.Event()
+        cancelled.set()
+        with unittest.mock.patch('util.windows.samba.gpo.ADS_STRUCT') as ads:
+            ads.return_value.connect.return_value = True
+            self.assertEqual(creds.get_gpos('user', dict(), 'dc1', cancelled), [])
+            ads.return_value.get_gpo_list.assert_not_called()
+
+    def test_failed_request_marks_silent_dc(self):
+        '''
+        DC failing GPO list request is marked unreachable only when it
+        does not answer CLDAP ping either.
+        '''
+        from util.exceptions import GetGPOListFail
+
+        creds = self.make_creds(answering=['pdc'])
+        creds.get_cached_gpt_versions = lambda username: dict()
+        creds.get_gpos = unittest.mock.Mock(side_effect=GetGPOListFail('Failed'))
+        creds.get_offline_gpos = lambda username: None
+        with self.assertRaises(GetGPOListFail):
+            creds.update_gpos('user')
+
+        self.assertEqual(creds.get_gpos.call_count, 2)
+        self.assertFalse(creds.is_reachable('dc1'))
+        self.assertTrue(creds.is_reachable('pdc'))
+
+    def test_hedged_failures(self):
+        '''
+        Only DCs whose requests failed are checked, request still
+        running is cancelled when another DC answers.
+        '''
+        from util.exceptions import GetGPOListFail
+
+        answer = threading.Event()
+        self.addCleanup(answer.set)
+        cancelled_requests = list()
+        versions = dict()
+        contexts = list()
+        lp_numbers = itertools.count()
+
+        def request_credentials():
+            lp = next(lp_numbers)
+            return lp, 'creds-{}'.format(lp)
+
+        def get_gpos(username, dict_gpo_name_version, dc, cancelled, lp, creds):
+            self.assertIs(dict_gpo_name_version, versions)
+            self.assertEqual(creds, 'creds-{}'.format(lp))
+            contexts.append(lp)
+            if dc == 'dc1':
+                answer.wait()
+                cancelled_requests.append(cancelled.is_set())
+                return list()
+            if dc == 'dc2':
+                raise GetGPOListFail('Failed')
+            return ['gpo']
+
+        creds = self.make_creds()
+        creds.dc_site_servers = ['dc2']
+        creds.get_gpos = get_gpos
+        creds.request_credentials = request_credentials
+        creds.probe = unittest.mock.Mock()
+        self.assertEqual(creds.get_gpos_hedged('user', versions, 0.01), ['gpo'])
+        self.assertEqual(creds.selected_dc, 'pdc')
+        creds.probe.assert_called_once_with(['dc2'])
+
+        answer.set()
+        for _ in range(100):
+            if cancelled_requests:
+                break
+            time.sleep(0.01)
+        self.assertEqual(cancelled_requests, [True])
+        # Every request uses its own loadparm and credentials
+        self.assertEqual(sorted(contexts), [0, 1, 2])
+
+    def test_select_reachable(self):
+        creds = self.make_creds()
+        creds.dc_history.update('dc1', None)
+        creds.dc_history.update('dc2', None)
+        creds.dc_history.update('dc2', None)
+        self.assertEqual(creds.select_reachable(['dc1', 'dc3', None]), ['dc3'])
+        # The server which failed the least is tried when no other is left
+        self.assertEqual(creds.select_reachable(['dc2', 'dc1']), ['dc1'])
+
+    def test_locate_dc_offline(self):
+        '''
+        DC location is skipped when known servers failed recently and
+        do not answer now.
+        '''
+        creds = self.make_creds()
+        creds.dc_history.update('dc1', None)
+        creds.set_dc = unittest.mock.Mock()
+        self.assertFalse(creds.locate_dc(None))
+        creds.set_dc.assert_not_called()
+
+        creds = self.make_creds(answering=['dc1'])
+        creds.dc_history.update('dc1', None)
+        creds.set_dc = unittest.mock.Mock()
+        self.assertTrue(creds.locate_dc(None))
+        creds.set_dc.assert_called_once_with(None)
+
+    def test_locate_dc_offline_expired(self):
+        '''
+        Known servers are pinged before DC location even when they
+        failed longer than unreachable DC TTL ago.
+        '''
+        creds = self.make_creds()
+        creds.dc_history.update('dc1', None)
+        creds.dc_history.servers['dc1']['timestamp'] -= (creds.unreachable_dc_ttl + 60) * 60
+        self.assertTrue(creds.is_reachable('dc1'))
+        creds.set_dc = unittest.mock.Mock()
+        self.assertFalse(creds.locate_dc(None))
+        creds.set_dc.assert_not_called()
+
+    def test_offline_gpos(self):
+        creds = self.make_creds()
+        gpt_path = pathlib.Path(self.tmpdir.name, 'gpt')
+        cached = dict({'Policy': dict({'version': '3', 'correct_path': str(gpt_path)})})
+        creds.get_cached_gpt_versions = lambda username: cached
+        creds.save_gpo_list('user', [gpo_entry('{1}', 'Policy', 3)])
+
+        # GPT removed from the cache
+        self.assertIsNone(creds.get_offline_gpos('user'))
+
+        gpt_path.mkdir()
+        gpos = creds.get_offline_gpos('user')
+        self.assertEqual([gpo.display_name for gpo in gpos], ['Policy'])
+        self.assertEqual(gpos[0].file_sys_path, '')
+
+        # GPT cached in another version
+        cached['Policy']['version'] = '2'
+        self.assertIsNone(creds.get_offline_gpos('user'))
+
+
+if __name__ == '__main__':
+    unittest.main()
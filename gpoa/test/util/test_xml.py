@@ -0,0 +1,45 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2019-2024 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import unittest
+
+from util.xml import get_xml_root, iter_xml_items
+
+
+class XmlItemsTestCase(unittest.TestCase):
+    def test_items(self):
+        '''
+        Streaming reader yields the same items as the top-level element
+        '''
+        for name in ('Shortcuts.xml', 'Printers.xml', 'EnvironmentVariables.xml'):
+            xml_file = '{}/test/gpt/data/{}'.format(os.getcwd(), name)
+            expected = [(item.tag, item.attrib, item.find('Properties').attrib)
+                        for item in get_xml_root(xml_file)]
+            items = [(item.tag, dict(item.attrib), dict(item.find('Properties').attrib))
+                     for item in iter_xml_items(xml_file)]
+            self.assertTrue(items)
+            self.assertEqual(items, expected)
+
+    def test_items_cleared(self):
+        xml_file = '{}/test/gpt/data/Printers.xml'.format(os.getcwd())
+        previous = None
+        for item in iter_xml_items(xml_file):
+            if previous is not None:
+                self.assertEqual(len(previous), 0)
+            previous = item
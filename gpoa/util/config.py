@@ -16,6 +16,8 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import os
+
 from .util import (
       get_backends
     , get_default_policy_name
@@ -81,6 +83,67 @@ class GPConfig:
         self.dict_backend[self.__gpoa_entry]['local-policy'] = template_name
         self.write_config(self.dict_backend)
 
+    def get_parse_workers(self):
+        '''
+        Fetch the number of processes used to parse GPTs. Value 1
+        disables parallel parsing.
+        '''
+        return self._get_int('parse-workers', min(4, os.cpu_count() or 1), minimum=1)
+
+    def get_applier_workers(self):
+        '''
+        Fetch the number of appliers which may run at the same time.
+        Value 1 runs appliers one by one.
+        '''
+        return self._get_int('applier-workers', 4, minimum=1)
+
+    def get_topology_cache_ttl(self):
+        '''
+        Fetch the time in hours during which Active Directory sites and
+        domain controllers found via LDAP are reused. Value 0 disables
+        the cache.
+        '''
+        return self._get_int('topology-cache-ttl', 8)
+
+    def get_unreachable_dc_ttl(self):
+        '''
+        Fetch the time in minutes during which domain controller which
+        failed to answer is not sent requests unless no other domain
+        controller is left. It is still pinged on every run. Value 0
+        disables skipping.
+        '''
+        return self._get_int('unreachable-dc-ttl', 10)
+
+    def get_hedge_delay(self):
+        '''
+        Fetch the time in milliseconds after which GPO list is requested
+        from the next domain controller while the previous one does not
+        answer. Value 0 (default) disables hedged requests.
+        '''
+        return self._get_int('hedge-delay', 0)
+
+    def get_full_apply_interval(self):
+        '''
+        Fetch the interval in hours after which all appliers are run
+        regardless of changes in their inputs. Value 0 disables
+        skipping of appliers.
+        '''
+        return self._get_int('full-apply-interval', 24)
+
+    def _get_int(self, key, default, minimum=0):
+        '''
+        Fetch integer gpoa setting not less than minimum, default is
+        returned when it is not set or is not a number.
+        '''
+        if self.__gpoa_entry in self.dict_backend:
+            if key in self.dict_backend[self.__gpoa_entry]:
+                try:
+                    return max(minimum, int(self.dict_backend[self.__gpoa_entry][key]))
+                except ValueError:
+                    pass
+
+        return default
+
     def write_config(self, data):
         self.writer(self.__config_path, data)
         self.registry.dconf_update(custom_db_file=self.__dconf_db_path, custom_path=self.__dconf_locald_path)
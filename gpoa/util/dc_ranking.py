@@ -0,0 +1,198 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2019-2024 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import concurrent.futures
+import json
+import os
+import queue
+import threading
+import time
+
+from .logging import log
+from .paths import dc_latency_file
+
+
+# Must be incremented every time history changes its layout
+_history_format = 1
+# Weight of the last measurement in the moving average
+_alpha = 0.3
+# Servers not seen for this number of days are forgotten
+_history_days = 30
+_probe_workers = 8
+
+
+def probe_servers(servers, probe, workers=_probe_workers):
+    '''
+    Call probe for every server concurrently and measure its latency.
+    Returns dictionary of latencies in seconds, None stands for failed
+    probe.
+    '''
+    def measure(dc):
+        start = time.perf_counter()
+        try:
+            probe(dc)
+        except Exception as exc:
+            logdata = dict({'dc': dc, 'exc': str(exc)})
+            log('D223', logdata)
+            return None
+        latency = time.perf_counter() - start
+        log('D222', lambda: dict({'dc': dc, 'latency': round(latency, 6)}))
+        return latency
+
+    servers = list(dict.fromkeys(servers))
+    if not servers:
+        return dict()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(workers, len(servers))) as executor:
+        return dict(zip(servers, executor.map(measure, servers)))
+
+
+def hedged_call(servers, request, delay):
+    '''
+    Call request for the first server and repeat it for the next server
+    each time all running requests failed or did not answer within delay
+    seconds. Request is called with the server and threading.Event
+    which is set when its result is no longer needed, so abandoned
+    request may stop early and release its connection. Requests still
+    running are left to finish in daemon threads. Returns the server
+    and the result of the first successful request together with the
+    list of servers whose requests failed, the server and the result
+    are None when all requests failed.
+    '''
+    results = queue.Queue()
+    cancelled = threading.Event()
+    pending = iter(servers)
+    failed = list()
+    running = 0
+
+    def run(dc):
+        try:
+            results.put((dc, request(dc, cancelled), None))
+        except Exception as exc:
+            results.put((dc, None, exc))
+
+    def start_next(hedged=False):
+        dc = next(pending, None)
+        if dc is None:
+            return 0
+        if hedged:
+            log('D228', lambda: dict({'dc': dc, 'delay': delay}))
+        threading.Thread(target=run, args=(dc,), daemon=True).start()
+        return 1
+
+    running += start_next()
+    while running:
+        try:
+            dc, result, exc = results.get(timeout=delay)
+        except queue.Empty:
+            running += start_next(hedged=True)
+            continue
+        running -= 1
+        if exc is None:
+            cancelled.set()
+            return dc, result, failed
+        failed.append(dc)
+        running += start_next()
+
+    return None, None, failed
+
+
+class dc_latency_history:
+    '''
+    Exponentially weighted moving average of domain controller
+    latencies kept between runs.
+    '''
+    def __init__(self):
+        self.history_file = dc_latency_file()
+        self.servers = dict()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.history_file, 'r') as f:
+                history = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(history, dict) and history.get('format') == _history_format:
+            self.servers = history.get('servers', dict())
+
+    def save(self):
+        oldest = time.time() - _history_days * 86400
+        history = dict()
+        history['format'] = _history_format
+        history['servers'] = {dc: entry for dc, entry in self.servers.items()
+                              if entry.get('timestamp', 0) >= oldest}
+
+        tmp_file = '{}.{}.tmp'.format(self.history_file, os.getpid())
+        try:
+            with open(tmp_file, 'w') as f:
+                json.dump(history, f)
+            os.rename(tmp_file, self.history_file)
+        except Exception as exc:
+            logdata = dict({'history_file': str(self.history_file), 'exc': exc})
+            log('D224', logdata)
+            try:
+                os.unlink(tmp_file)
+            except OSError:
+                pass
+
+    def update(self, dc, latency):
+        entry = self.servers.setdefault(dc, dict({'latency': None, 'failures': 0}))
+        if latency is None:
+            entry['failures'] += 1
+        else:
+            if entry['latency'] is None:
+                entry['latency'] = latency
+            else:
+                entry['latency'] = _alpha * latency + (1 - _alpha) * entry['latency']
+            entry['failures'] = 0
+        entry['timestamp'] = time.time()
+
+    def failed_last(self, dc):
+        '''
+        Check if the last attempt to reach server failed, whenever it
+        was made.
+        '''
+        entry = self.servers.get(dc)
+        return entry is not None and bool(entry['failures'])
+
+    def is_unreachable(self, dc, ttl):
+        '''
+        Check if the last attempt to reach server failed less than ttl
+        minutes ago.
+        '''
+        if not self.failed_last(dc):
+            return False
+        entry = self.servers[dc]
+        return 0 <= time.time() - entry.get('timestamp', 0) < ttl * 60
+
+    def _rank(self, dc):
+        entry = self.servers.get(dc)
+        if entry is None:
+            return (1, 0)
+        if entry['failures']:
+            return (2, entry['failures'])
+        return (0, entry['latency'])
+
+    def rank(self, servers):
+        '''
+        Sort servers by average latency. Servers without history follow
+        the responding ones and servers which failed the last probe are
+        placed at the end. Order of equal servers is preserved.
+        '''
+        return sorted(servers, key=self._rank)
@@ -19,6 +19,7 @@
 import json
 import datetime
 import logging
+import threading
 
 from messages import message_with_code
 
@@ -54,24 +55,37 @@ class slogm(object):
 
         return result
 
-def log(message_code, data=None):
-    mtype = message_code[0]
+_log_levels = {
+      'I': logging.INFO
+    , 'W': logging.WARNING
+    , 'E': logging.ERROR
+    , 'F': logging.FATAL
+    , 'D': logging.DEBUG
+}
 
-    if 'I' == mtype:
-        logging.info(slogm(message_with_code(message_code), data))
-        return
-    if 'W' == mtype:
-        logging.warning(slogm(message_with_code(message_code), data))
-        return
-    if 'E' == mtype:
-        logging.error(slogm(message_with_code(message_code), data))
-        return
-    if 'F' == mtype:
-        logging.fatal(slogm(message_with_code(message_code), data))
-        return
-    if 'D' == mtype:
-        logging.debug(slogm(message_with_code(message_code), data))
-        return
+# Number of errors logged by every thread
+_thread_errors = threading.local()
 
-    logging.error(slogm(message_with_code(message_code), data))
+def error_count():
+    '''
+    Get the number of error and fatal messages logged by the current
+    thread. Callers compare it before and after a call to find out if
+    the call failed while it handled its errors itself.
+    '''
+    return getattr(_thread_errors, 'count', 0)
 
+def log(message_code, data=None):
+    '''
+    Log the message with the code. Messages below the current log level
+    are dropped before anything is formatted. The data may be passed as
+    a callable returning the dictionary to build it only when the
+    message is going to be logged.
+    '''
+    level = _log_levels.get(message_code[0], logging.ERROR)
+    if level >= logging.ERROR:
+        _thread_errors.count = error_count() + 1
+    if not logging.root.isEnabledFor(level):
+        return
+    if callable(data):
+        data = data()
+    logging.log(level, slogm(message_with_code(message_code), data))
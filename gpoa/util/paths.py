@@ -93,6 +93,54 @@ def local_policy_cache():
 
     return lpcache
 
+def applier_state_file(username=None):
+    '''
+    Returns path to file with fingerprints of applier inputs saved on
+    the previous run.
+    '''
+    state_dir = pathlib.Path.joinpath(cache_dir(), 'appliers')
+
+    if not state_dir.exists():
+        state_dir.mkdir(parents=True, exist_ok=True)
+
+    return pathlib.Path.joinpath(state_dir, '{}.json'.format(username or 'machine'))
+
+def topology_cache_file():
+    '''
+    Returns path to file with Active Directory sites and domain
+    controllers found on the previous run.
+    '''
+    return pathlib.Path.joinpath(cache_dir(), 'ad-topology.json')
+
+def dc_latency_file():
+    '''
+    Returns path to file with average latencies of domain controllers.
+    '''
+    return pathlib.Path.joinpath(cache_dir(), 'dc-latency.json')
+
+def gpo_list_file(username):
+    '''
+    Returns path to file with GPO list received from domain controller
+    on the previous run.
+    '''
+    gpo_list_dir = pathlib.Path.joinpath(cache_dir(), 'gpo-list')
+
+    if not gpo_list_dir.exists():
+        gpo_list_dir.mkdir(parents=True, exist_ok=True)
+
+    return pathlib.Path.joinpath(gpo_list_dir, '{}.json'.format(username))
+
+def parsed_gpt_cache_dir():
+    '''
+    Returns path to directory with parsed GPT files.
+    '''
+    parsed_cache = pathlib.Path.joinpath(cache_dir(), 'parsed-gpt')
+
+    if not parsed_cache.exists():
+        parsed_cache.mkdir(parents=True, exist_ok=True)
+
+    return parsed_cache
+
 def get_dconf_config_path(uid = None):
     if uid:
         return f'/etc/dconf/db/policy{uid}.d/'
@@ -105,6 +153,12 @@ def get_dconf_config_file(uid = None):
     else:
         return '/etc/dconf/db/policy.d/policy.ini'
 
+def get_dconf_db_file(uid = None):
+    if uid:
+        return f'/etc/dconf/db/policy{uid}'
+    else:
+        return '/etc/dconf/db/policy'
+
 def get_desktop_files_directory():
     return '/usr/share/applications'
 
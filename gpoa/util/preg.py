@@ -17,6 +17,9 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
+import mmap
+import os
+import struct
 from xml.etree import ElementTree
 from storage import registry_factory
 from storage.dconf_registry import load_preg_dconf
@@ -54,20 +57,30 @@ def load_pol_preg(polfile):
     '''
     Parse PReg file and return its preg object
     '''
+    entries = pentries()
+    entries.entries = list(read_pol_entries(polfile))
+    return entries
+
+
+def read_pol_entries(polfile):
+    '''
+    Generator of the entries of memory-mapped PReg file
+    '''
     logdata = dict({'polfile': polfile})
     log('D31', logdata)
-    gpparser = GPPolParser()
-    data = None
 
     with open(polfile, 'rb') as f:
-        data = f.read()
-        logdata = dict({'polfile': polfile, 'length': len(data)})
+        length = os.fstat(f.fileno()).st_size
+        logdata = dict({'polfile': polfile, 'length': length})
         log('D33', logdata)
-        gpparser.parse(data)
+        if not length:
+            return
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
 
-    #print(gpparser.pol_file.__ndr_print__())
-    pentries = preg2entries(gpparser.pol_file)
-    return pentries
+    # Entries hold copies of their data so the file is unmapped as
+    # soon as parsing is finished
+    with data:
+        yield from parse_preg(data)
 
 
 def preg_keymap(preg):
@@ -81,14 +94,23 @@ def preg_keymap(preg):
     return keymap
 
 
-def merge_polfile(preg, sid=None, reg_name='registry', reg_path=None, policy_name='Unknown', username='Machine', gpo_info=None):
-    pregfile = load_preg(preg)
+def merge_pregfile(pregfile, preg, sid=None, policy_name='Unknown', username='Machine', gpo_info=None):
+    '''
+    Merge already loaded preg object into the registry.
+    '''
     if sid is None and username == 'Machine':
         load_preg_dconf(pregfile, preg, policy_name, None, gpo_info)
     else:
         load_preg_dconf(pregfile, preg, policy_name, username, gpo_info)
     logdata = dict({'pregfile': preg})
     log('D32', logdata)
+
+
+def merge_polfile(preg, sid=None, reg_name='registry', reg_path=None, policy_name='Unknown', username='Machine', gpo_info=None):
+    # Whole file is parsed before merging so malformed file is rejected
+    # without leaving part of its entries in the registry
+    pregfile = load_preg(preg)
+    merge_pregfile(pregfile, preg, sid, policy_name, username, gpo_info)
     #log dconf
     return
     storage = registry_factory(reg_name, reg_path)
@@ -99,28 +121,97 @@ def merge_polfile(preg, sid=None, reg_name='registry', reg_path=None, policy_nam
             storage.add_hkcu_entry(entry, sid, policy_name)
 
 
+REG_NONE = 0
+REG_SZ = 1
+REG_EXPAND_SZ = 2
+REG_DWORD = 4
+REG_DWORD_BIG_ENDIAN = 5
+REG_QWORD = 11
+
+_preg_header = struct.Struct('<4sI')
+_preg_signature = b'PReg'
+_preg_open = '['.encode('utf-16-le')
+_preg_close = ']'.encode('utf-16-le')
+_preg_separator = ';'.encode('utf-16-le')
+_preg_terminator = b'\0\0'
+_preg_uint32 = struct.Struct('<I')
+
+
+def decode_preg_data(value_type, raw):
+    '''
+    Convert raw value of PReg entry the same way Samba PReg parser
+    does: strings and numbers are decoded and the data of other types
+    is returned as bytes.
+    '''
+    if value_type in (REG_SZ, REG_EXPAND_SZ):
+        return raw.decode('utf-16-le', 'replace').partition('\0')[0]
+    if value_type == REG_DWORD:
+        return int.from_bytes(raw[:4], 'little')
+    if value_type == REG_DWORD_BIG_ENDIAN:
+        return int.from_bytes(raw[:4], 'big')
+    if value_type == REG_QWORD:
+        return int.from_bytes(raw[:8], 'little')
+    if value_type == REG_NONE:
+        return None
+    return raw
+
+
 class entry:
+    __slots__ = ('keyname', 'valuename', 'type', 'data')
+
     def __init__(self, e_keyname, e_valuename, e_type, e_data):
         self.keyname = e_keyname
         self.valuename = e_valuename
         self.type = e_type
         self.data = e_data
-        logdata = dict()
-        logdata['keyname'] = self.keyname
-        logdata['valuename'] = self.valuename
-        logdata['type'] = self.type
-        logdata['data'] = self.data
-        log('D22', logdata)
 
 class pentries:
     def __init__(self):
         self.entries = list()
 
 
-def preg2entries(preg_obj):
-    entries = pentries()
-    for elem in preg_obj.entries:
-        entry_obj = entry(elem.keyname, elem.valuename, elem.type, elem.data)
-        entries.entries.append(entry_obj)
-    return entries
+def _read_preg_string(buf, pos):
+    '''
+    Read null-terminated UTF-16LE string and return it along with
+    the position after the terminator.
+    '''
+    end = buf.find(_preg_terminator, pos)
+    while end != -1 and (end - pos) % 2:
+        end = buf.find(_preg_terminator, end + 1)
+    if end == -1:
+        raise ValueError('Unterminated string in PReg entry at {}'.format(pos))
+    return buf[pos:end].decode('utf-16-le', 'replace'), end + 2
+
+
+def _expect(buf, pos, token):
+    if buf[pos:pos + len(token)] != token:
+        raise ValueError('Malformed PReg entry at {}'.format(pos))
+    return pos + len(token)
+
+
+def parse_preg(buf):
+    '''
+    Generator of the entries of PReg data from bytes or mmap object.
+    '''
+    if len(buf) < _preg_header.size:
+        raise ValueError('PReg data is too short')
+    signature, version = _preg_header.unpack_from(buf, 0)
+    if signature != _preg_signature:
+        raise ValueError('PReg signature not found')
+
+    pos = _preg_header.size
+    length = len(buf)
+    while pos < length:
+        pos = _expect(buf, pos, _preg_open)
+        keyname, pos = _read_preg_string(buf, pos)
+        pos = _expect(buf, pos, _preg_separator)
+        valuename, pos = _read_preg_string(buf, pos)
+        pos = _expect(buf, pos, _preg_separator)
+        value_type = _preg_uint32.unpack_from(buf, pos)[0]
+        pos = _expect(buf, pos + 4, _preg_separator)
+        size = _preg_uint32.unpack_from(buf, pos)[0]
+        pos = _expect(buf, pos + 4, _preg_separator)
+        data = decode_preg_data(value_type, bytes(buf[pos:pos + size]))
+        pos = _expect(buf, pos + size, _preg_close)
+        yield entry(keyname, valuename, value_type, data)
 
@@ -0,0 +1,104 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2019-2024 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import ipaddress
+
+
+class prefix_node:
+    __slots__ = ('children', 'network', 'value')
+
+    def __init__(self):
+        self.children = [None, None]
+        self.network = None
+        self.value = None
+
+
+class subnet_index:
+    '''
+    Binary prefix tree over IPv4 and IPv6 networks. Lookup walks the
+    bits of the address and returns the value of the longest (most
+    specific) network containing it.
+    '''
+    def __init__(self, subnets=()):
+        self.roots = {4: prefix_node(), 6: prefix_node()}
+        for network, value in subnets:
+            self.add(network, value)
+
+    @staticmethod
+    def _bits(address, length):
+        number = int(address)
+        for shift in range(address.max_prefixlen - 1, address.max_prefixlen - 1 - length, -1):
+            yield (number >> shift) & 1
+
+    def add(self, network, value):
+        network = ipaddress.ip_network(network, strict=False)
+        node = self.roots[network.version]
+        for bit in self._bits(network.network_address, network.prefixlen):
+            if node.children[bit] is None:
+                node.children[bit] = prefix_node()
+            node = node.children[bit]
+        node.network = network
+        node.value = value
+
+    def lookup(self, address):
+        '''
+        Get (network, value) pair of the longest network containing
+        the address or None.
+        '''
+        address = ipaddress.ip_address(address)
+        node = self.roots[address.version]
+        found = None
+        for bit in self._bits(address, address.max_prefixlen):
+            if node.network is not None:
+                found = node
+            node = node.children[bit]
+            if node is None:
+                break
+        else:
+            if node.network is not None:
+                found = node
+        if found is None:
+            return None
+        return found.network, found.value
+
+    def match(self, addresses):
+        '''
+        Get value of the most specific network among the networks
+        containing any of the addresses. Equally specific matches are
+        resolved in favour of the lowest address.
+        '''
+        best = None
+        for address in sorted(addresses, key=lambda addr: (addr.version, int(addr))):
+            found = self.lookup(address)
+            if found and (best is None or found[0].prefixlen > best[0].prefixlen):
+                best = found
+        return best[1] if best else None
+
+    def items(self):
+        '''
+        List of [network, value] pairs suitable for JSON serialization.
+        '''
+        result = list()
+        stack = [self.roots[6], self.roots[4]]
+        while stack:
+            node = stack.pop()
+            if node.network is not None:
+                result.append([str(node.network), node.value])
+            stack.extend(child for child in reversed(node.children) if child is not None)
+        return result
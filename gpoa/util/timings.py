@@ -0,0 +1,66 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2019-2024 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+_enabled = False
+_records = list()
+_lock = threading.Lock()
+
+
+def enable_timings():
+    global _enabled
+    _enabled = True
+
+
+@contextmanager
+def timed(phase, name=None):
+    '''
+    Measure wall and CPU time of the block when timings are enabled.
+    CPU time is measured for the current thread, so appliers running
+    concurrently are accounted separately. Time spent in child
+    processes is not included.
+    '''
+    if not _enabled:
+        yield
+        return
+
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        yield
+    finally:
+        record = dict()
+        record['phase'] = phase
+        if name is not None:
+            record['name'] = name
+        record['wall'] = round(time.perf_counter() - wall_start, 6)
+        record['cpu'] = round(time.thread_time() - cpu_start, 6)
+        with _lock:
+            _records.append(record)
+
+
+def get_timings():
+    '''
+    Get measured phases in order of their completion.
+    '''
+    with _lock:
+        return list(_records)
@@ -0,0 +1,87 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2019-2024 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import json
+import os
+import time
+
+from .logging import log
+from .paths import topology_cache_file
+
+
+# Must be incremented every time cached topology changes its layout
+_cache_format = 2
+
+
+class topology_cache:
+    '''
+    Active Directory sites and domain controllers found on the previous
+    run. Cached topology is valid for ttl hours and only while the
+    domain stays the same.
+    '''
+    def __init__(self, realm, ttl, refresh=False):
+        self.realm = (realm or '').lower()
+        self.ttl = ttl
+        self.refresh = refresh
+        self.cache_file = topology_cache_file()
+
+    def load(self):
+        '''
+        Get cached topology or None if it is absent or outdated.
+        '''
+        if self.refresh or self.ttl <= 0:
+            return None
+        try:
+            with open(self.cache_file, 'r') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if (not isinstance(cached, dict)
+                or cached.get('format') != _cache_format
+                or cached.get('realm') != self.realm):
+            return None
+        age = time.time() - cached.get('timestamp', 0)
+        if age < 0 or age > self.ttl * 3600:
+            return None
+
+        log('D219', lambda: dict({'realm': self.realm, 'age': int(age)}))
+        return cached.get('topology')
+
+    def save(self, topology):
+        if self.ttl <= 0:
+            return
+        cached = dict()
+        cached['format'] = _cache_format
+        cached['realm'] = self.realm
+        cached['timestamp'] = time.time()
+        cached['topology'] = topology
+
+        tmp_file = '{}.{}.tmp'.format(self.cache_file, os.getpid())
+        try:
+            with open(tmp_file, 'w') as f:
+                json.dump(cached, f)
+            os.rename(tmp_file, self.cache_file)
+        except Exception as exc:
+            logdata = dict({'cache_file': str(self.cache_file), 'exc': exc})
+            log('D220', logdata)
+            try:
+                os.unlink(tmp_file)
+            except OSError:
+                pass
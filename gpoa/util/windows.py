@@ -17,10 +17,12 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
+import json
 import os
 from pathlib import Path
 from samba import getopt as options
 from samba import NTSTATUSError
+from samba import ntstatus
 
 try:
     from samba.gpclass import get_dc_hostname, check_refresh_gpo_list
@@ -38,6 +40,12 @@ from .util import get_homedir, get_uid_by_username
 from .exceptions import GetGPOListFail
 from .logging import log
 from .samba import smbopts
+from .timings import timed
+from .paths import gpo_list_file
+from .config import GPConfig
+from .topology_cache import topology_cache
+from .subnet_index import subnet_index
+from .dc_ranking import dc_latency_history, hedged_call, probe_servers
 from gpoa.storage import registry_factory
 from samba.samdb import SamDB
 from samba.auth import system_session
@@ -47,13 +55,54 @@ import ipaddress
 import netifaces
 import random
 
+
+class cached_gpo:
+    '''
+    GPO from the list received on the previous run. Empty SYSVOL path
+    makes backend use GPT cached in the file system.
+    '''
+    def __init__(self, entry):
+        self.name = entry.get('name')
+        self.display_name = entry.get('display_name')
+        self.version = entry.get('version')
+        self.link = entry.get('link')
+        self.file_sys_path = ''
+
+
+# SMB errors meaning that server did not answer at all
+_network_errors = frozenset([
+      ntstatus.NT_STATUS_IO_TIMEOUT
+    , ntstatus.NT_STATUS_HOST_UNREACHABLE
+    , ntstatus.NT_STATUS_NETWORK_UNREACHABLE
+    , ntstatus.NT_STATUS_PORT_UNREACHABLE
+    , ntstatus.NT_STATUS_CONNECTION_REFUSED
+    , ntstatus.NT_STATUS_CONNECTION_RESET
+    , ntstatus.NT_STATUS_CONNECTION_DISCONNECTED
+])
+
+
+def is_network_error(exc):
+    '''
+    Check if SMB request failed because server is unreachable rather
+    than because it refused the request.
+    '''
+    return isinstance(exc, NTSTATUSError) and exc.args[0] in _network_errors
+
+
 class smbcreds (smbopts):
 
     def __init__(self, dc_fqdn=None):
         smbopts.__init__(self, 'GPO Applier')
         self.credopts = options.CredentialsOptions(self.parser)
         self.creds = self.credopts.get_credentials(self.lp, fallback_machine=True)
-        self.set_dc(dc_fqdn)
+        self.dc_history = dc_latency_history()
+        self.unreachable_dc_ttl = GPConfig().get_unreachable_dc_ttl()
+        self.offline = not self.locate_dc(dc_fqdn)
+        if self.offline:
+            self.dc_site_servers = list()
+            self.all_servers = list()
+            self.pdc_emulator_server = None
+            return
         self.sDomain =  SiteDomainScanner(self.creds, self.lp, self.selected_dc)
         self.dc_site_servers = self.sDomain.select_site_servers()
         self.all_servers = self.sDomain.select_all_servers()
@@ -61,6 +110,86 @@ class smbcreds (smbopts):
         for element in self.dc_site_servers
         if element in self.all_servers]
         self.pdc_emulator_server = self.sDomain.select_pdc_emulator_server()
+        self.rank_servers()
+
+    def locate_dc(self, dc_fqdn):
+        '''
+        Select DC unless the domain is unreachable. DC location waits
+        for DNS and CLDAP timeouts when the host is off the domain
+        network, so domain controllers known from the previous runs
+        are pinged first when the last attempt to reach each of them
+        failed, and when DC location fails. The age of the attempts is
+        not checked: refresh runs less often than the unreachable DC
+        TTL expires. Returns False when none of them answered.
+        '''
+        known_servers = list(self.dc_history.servers)
+        if (dc_fqdn is None and known_servers
+                and all(self.dc_history.failed_last(dc) for dc in known_servers)
+                and not self.probe(known_servers)):
+            log('W28')
+            self.selected_dc = None
+            return False
+
+        try:
+            self.set_dc(dc_fqdn)
+        except Exception:
+            if dc_fqdn is not None or not known_servers or self.probe(known_servers):
+                raise
+            log('W28')
+            return False
+        return True
+
+    def rank_servers(self):
+        '''
+        Probe site domain controllers with CLDAP ping and order both
+        server lists by their average latency, the fastest first.
+        Servers which were unreachable recently are probed as well so
+        they are used again as soon as they answer.
+        '''
+        self.probe(self.dc_site_servers)
+        self.dc_site_servers = self.dc_history.rank(self.dc_site_servers)
+        self.all_servers = self.dc_history.rank(self.all_servers)
+
+    def probe(self, servers):
+        '''
+        Ping servers with CLDAP and record results in the latency
+        history. Returns the list of servers which answered.
+        '''
+        servers = [dc for dc in servers if dc]
+        if not servers:
+            return list()
+        with timed('dc_probe'):
+            latencies = probe_servers(servers, self.cldap_ping)
+        for dc, latency in latencies.items():
+            self.dc_history.update(dc, latency)
+        self.dc_history.save()
+        return [dc for dc, latency in latencies.items() if latency is not None]
+
+    def is_reachable(self, dc):
+        if dc and self.dc_history.is_unreachable(dc, self.unreachable_dc_ttl):
+            log('D225', dict({'dc': dc}))
+            return False
+        return True
+
+    def select_reachable(self, servers):
+        '''
+        Drop servers which were unreachable recently. When all of them
+        were, the one which failed the least is kept so the request is
+        still tried.
+        '''
+        servers = [dc for dc in dict.fromkeys(servers) if dc]
+        reachable = [dc for dc in servers if self.is_reachable(dc)]
+        if not reachable:
+            reachable = self.dc_history.rank(servers)[:1]
+        return reachable
+
+    def mark_unreachable(self, dc):
+        if dc:
+            self.dc_history.update(dc, None)
+            self.dc_history.save()
+
+    def cldap_ping(self, dc):
+        netcmd_get_domain_infos_via_cldap(self.lp, None, dc)
 
     def get_dc(self):
         return self.selected_dc
@@ -91,6 +220,12 @@ class smbcreds (smbopts):
         Get current Active Directory domain name
         '''
         dns_domainname = None
+        if self.offline:
+            # Kerberos realm is the upper case DNS name of the domain
+            dns_domainname = self.get_realm().lower()
+            logdata = dict({'domain': dns_domainname})
+            log('D18', logdata)
+            return dns_domainname
         try:
             # Get CLDAP record about domain
             # Look and python/samba/netcmd/domain.py for more examples
@@ -104,21 +239,41 @@ class smbcreds (smbopts):
 
         return dns_domainname
 
-    def get_gpos(self, username):
+    def get_cached_gpt_versions(self, username):
         '''
-        Get GPO list for the specified username for the specified DC
-        hostname
+        Get versions and paths of GPTs cached on the previous runs
         '''
-        gpos = list()
         if Dconf_registry.get_info('machine_name') == username:
             dconf_dict = Dconf_registry.get_dictionary_from_dconf_file_db()
         else:
             dconf_dict = Dconf_registry.get_dictionary_from_dconf_file_db(get_uid_by_username(username))
-        dict_gpo_name_version = extract_display_name_version(dconf_dict)
+        return extract_display_name_version(dconf_dict)
+
+    def get_gpos(self, username, dict_gpo_name_version, dc=None, cancelled=None,
+                 lp=None, creds=None):
+        '''
+        Get GPO list for the specified username for the specified DC
+        hostname. GetGPOListFail is raised on failure for any DC,
+        including PDC emulator: empty list would make backend apply
+        empty policy set instead of the cached one. Request is dropped
+        after connection when cancelled event is set. Loadparm and
+        credentials of the object are used unless lp and creds given.
+        '''
+        if dc is None:
+            dc = self.selected_dc
+        if lp is None:
+            lp, creds = self.lp, self.creds
+        gpos = list()
         try:
             log('D48')
-            ads = samba.gpo.ADS_STRUCT(self.selected_dc, self.lp, self.creds)
-            if ads.connect():
+            ads = samba.gpo.ADS_STRUCT(dc, lp, creds)
+            if not ads.connect():
+                raise Exception('Unable to connect to {}'.format(dc))
+            elif cancelled is not None and cancelled.is_set():
+                # GPO list is already received from another DC, the
+                # connection is closed with ads
+                log('D229', dict({'dc': dc}))
+            else:
                 log('D47')
                 gpos = ads.get_gpo_list(username)
                 logdata = dict({'username': username})
@@ -136,31 +291,132 @@ class smbcreds (smbopts):
                     log('I2', ldata)
 
         except Exception as exc:
-            if self.selected_dc != self.pdc_emulator_server:
-                raise GetGPOListFail(exc)
-            logdata = dict({'username': username, 'dc': self.selected_dc})
+            logdata = dict({'username': username, 'dc': dc, 'exc': str(exc)})
             log('E17', logdata)
+            raise GetGPOListFail(str(exc))
 
         return gpos
 
-    def update_gpos(self, username):
+    def request_credentials(self):
+        '''
+        Create loadparm and credentials in the same way as for this
+        object, for the request running in a separate thread.
+        '''
+        opts = smbopts('GPO Applier')
+        credopts = options.CredentialsOptions(opts.parser)
+        return opts.lp, credopts.get_credentials(opts.lp, fallback_machine=True)
+
+    def get_gpos_hedged(self, username, dict_gpo_name_version, delay):
+        '''
+        Request GPO list from the selected DC and, if it does not answer
+        within delay seconds, from the next site DC and PDC emulator in
+        parallel. DC which answered first is used for SYSVOL refresh.
+        '''
+        candidates = self.select_reachable([self.selected_dc]
+                                           + self.dc_site_servers
+                                           + [self.pdc_emulator_server])
+        def request(dc, cancelled):
+            # Abandoned request keeps running after this method returns
+            # so it must not share samba objects with SYSVOL refresh
+            lp, creds = self.request_credentials()
+            return self.get_gpos(username, dict_gpo_name_version, dc, cancelled, lp, creds)
+
+        dc, gpos, failed = hedged_call(candidates, request, delay)
+        if dc is not None:
+            self.selected_dc = dc
+            self.dc_site_servers = [server for server in self.dc_site_servers if server != dc]
+        # Only requests which failed are checked, the ones still
+        # running may yet succeed
+        self.probe(failed)
+        return gpos
+
+    def save_gpo_list(self, username, gpos):
+        gpo_list = list()
+        for gpo in gpos:
+            entry = dict()
+            entry['name'] = gpo.name
+            entry['display_name'] = gpo.display_name
+            entry['version'] = gpo.version
+            entry['link'] = getattr(gpo, 'link', None)
+            gpo_list.append(entry)
+
+        list_file = gpo_list_file(username)
+        tmp_file = '{}.{}.tmp'.format(list_file, os.getpid())
+        try:
+            with open(tmp_file, 'w') as f:
+                json.dump(gpo_list, f)
+            os.rename(tmp_file, list_file)
+        except Exception as exc:
+            logdata = dict({'list_file': str(list_file), 'exc': str(exc)})
+            log('D227', logdata)
 
-        list_selected_dc = set()
+    def get_offline_gpos(self, username):
+        '''
+        Get GPO list received on the previous run when domain
+        controllers are unreachable. The list is usable only when GPTs
+        of all its GPOs are cached in the same versions.
+        '''
+        try:
+            with open(gpo_list_file(username), 'r') as f:
+                gpos = [cached_gpo(entry) for entry in json.load(f)]
+        except (OSError, ValueError, AttributeError):
+            gpos = None
+
+        cached = self.get_cached_gpt_versions(username)
+        def is_cached(gpo):
+            entry = cached.get(gpo.display_name)
+            return (entry is not None and entry.get('version') == str(gpo.version)
+                    and Path(entry.get('correct_path')).exists())
+
+        if gpos is None or not all(is_cached(gpo)
+                                   for gpo in gpos if gpo.name != 'Local Policy'):
+            log('D226', dict({'username': username}))
+            return None
 
+        log('W27', dict({'username': username}))
+        return gpos
 
+    def update_gpos(self, username):
+        if self.offline:
+            gpos = self.get_offline_gpos(username)
+            if gpos is None:
+                raise GetGPOListFail('Domain controllers are unreachable')
+            return gpos
 
         if self.dc_site_servers:
-            self.selected_dc = self.dc_site_servers.pop()
+            self.selected_dc = self.dc_site_servers.pop(0)
 
         self.all_servers = [dc for dc in self.all_servers if dc != self.selected_dc]
-        list_selected_dc.add(self.selected_dc)
-
-        try:
-            gpos = self.get_gpos(username)
 
-        except GetGPOListFail:
-            self.selected_dc = self.pdc_emulator_server
-            gpos = self.get_gpos(username)
+        gpos = None
+        hedge_delay = GPConfig().get_hedge_delay()
+        # Cache is read once because concurrent hedged requests must not
+        # rebuild it at the same time
+        dict_gpo_name_version = self.get_cached_gpt_versions(username)
+        with timed('gpo_list', username):
+            if hedge_delay:
+                gpos = self.get_gpos_hedged(username, dict_gpo_name_version, hedge_delay / 1000)
+            else:
+                failed = list()
+                for dc in self.select_reachable([self.selected_dc, self.pdc_emulator_server]):
+                    self.selected_dc = dc
+                    try:
+                        gpos = self.get_gpos(username, dict_gpo_name_version)
+                        break
+                    except GetGPOListFail:
+                        failed.append(dc)
+                # Request fails on wrong credentials or user as well, so
+                # DC is marked unreachable only if it does not answer ping
+                self.probe(failed)
+
+        if gpos is None:
+            # No domain controller answered, use GPTs from the cache
+            # instead of waiting for timeouts of SYSVOL access.
+            gpos = self.get_offline_gpos(username)
+            if gpos is None:
+                raise GetGPOListFail('Unable to get GPO list from any domain controller')
+            return gpos
+        list_selected_dc = set([self.selected_dc])
 
         while list_selected_dc:
             logdata = dict()
@@ -168,48 +424,122 @@ class smbcreds (smbopts):
             logdata['dc'] = self.selected_dc
             try:
                 log('D49', logdata)
-                check_refresh_gpo_list(self.selected_dc, self.lp, self.creds, gpos)
+                with timed('sysvol_refresh', self.selected_dc):
+                    check_refresh_gpo_list(self.selected_dc, self.lp, self.creds, gpos)
                 log('D50', logdata)
                 list_selected_dc.clear()
             except NTSTATUSError as smb_exc:
                 logdata['smb_exc'] = str(smb_exc)
+                if is_network_error(smb_exc):
+                    self.mark_unreachable(self.selected_dc)
                 if not check_scroll_enabled():
-                    if self.pdc_emulator_server and self.selected_dc != self.pdc_emulator_server:
+                    if (self.pdc_emulator_server and self.selected_dc != self.pdc_emulator_server
+                            and self.is_reachable(self.pdc_emulator_server)):
                         self.selected_dc = self.pdc_emulator_server
                         logdata['action'] = 'Selected pdc'
                         logdata['pdc'] = self.selected_dc
                         log('W11', logdata)
                     else:
                         log('F1', logdata)
-                        raise smb_exc
+                        offline_gpos = self.get_offline_gpos(username)
+                        if offline_gpos is None:
+                            raise smb_exc
+                        return offline_gpos
                 else:
                     if self.dc_site_servers:
-                        self.selected_dc = self.dc_site_servers.pop()
+                        self.selected_dc = self.dc_site_servers.pop(0)
                     elif self.all_servers:
-                        self.selected_dc = self.all_servers.pop()
+                        self.selected_dc = self.all_servers.pop(0)
                     else:
                         self.selected_dc = self.pdc_emulator_server
 
 
-                    if self.selected_dc not in list_selected_dc:
+                    if self.selected_dc not in list_selected_dc and self.is_reachable(self.selected_dc):
                         logdata['action'] = 'Search another dc'
                         logdata['another_dc'] = self.selected_dc
                         log('W11', logdata)
                         list_selected_dc.add(self.selected_dc)
                     else:
                         log('F1', logdata)
-                        raise smb_exc
+                        offline_gpos = self.get_offline_gpos(username)
+                        if offline_gpos is None:
+                            raise smb_exc
+                        return offline_gpos
             except Exception as exc:
                 logdata['exc'] = str(exc)
                 log('F1', logdata)
                 raise exc
+
+        self.save_gpo_list(username, gpos)
         return gpos
 
 
 class SiteDomainScanner:
     def __init__(self, smbcreds, lp, dc):
-        self.samdb = SamDB(url='ldap://{}'.format(dc), session_info=system_session(), credentials=smbcreds, lp=lp)
-        self.pdc_emulator = self._search_pdc_emulator()
+        self.smbcreds = smbcreds
+        self.lp = lp
+        self.dc = dc
+        self.__samdb = None
+        try:
+            self.ip_addresses = self.get_ip_addresses()
+        except Exception as e:
+            self.ip_addresses = []
+        self.cache = topology_cache(lp.get('realm'),
+                                    GPConfig().get_topology_cache_ttl(),
+                                    Dconf_registry._force)
+        self.topology = self.cache.load()
+        if self.topology is not None and not self._site_unchanged(self.topology):
+            log('D221')
+            self.topology = None
+        if self.topology is None:
+            self.topology = self._scan_topology()
+        self.pdc_emulator = self.topology['pdc_emulator']
+
+    @property
+    def samdb(self):
+        '''
+        LDAP connection is opened only when topology is not cached
+        '''
+        if self.__samdb is None:
+            self.__samdb = SamDB(url='ldap://{}'.format(self.dc), session_info=system_session(), credentials=self.smbcreds, lp=self.lp)
+        return self.__samdb
+
+    def _site_unchanged(self, topology):
+        '''
+        Site is resolved from the cached subnets because host addresses
+        may have changed since topology was cached.
+        '''
+        index = subnet_index(topology.get('subnets', []))
+        return index.match(self.ip_addresses) == topology.get('site')
+
+    def _scan_topology(self):
+        '''
+        Search PDC emulator, site of the host and domain controllers
+        via LDAP. Topology is cached only when all searches succeed.
+        '''
+        topology = dict()
+        topology['pdc_emulator'] = self._search_pdc_emulator()
+        complete = True
+
+        try:
+            index = subnet_index(self.get_ad_subnets_sites().items())
+            our_site = index.match(self.ip_addresses)
+            topology['subnets'] = index.items()
+            topology['site'] = our_site
+            topology['site_servers'] = self.get_ad_site_servers(our_site) if our_site else []
+        except Exception as e:
+            topology['site_servers'] = []
+            complete = False
+
+        try:
+            topology['all_servers'] = self.get_ad_all_servers()
+        except Exception as e:
+            topology['all_servers'] = []
+            complete = False
+
+        if complete:
+            self.cache.save(topology)
+        return topology
 
     @staticmethod
     def _get_ldb_single_message_attr(ldb_message, attr_name, encoding='utf8'):
@@ -274,31 +604,17 @@ class SiteDomainScanner:
         return servers
 
     def check_ip_in_subnets(self, ip_addresses, subnets_sites):
-        return next((subnets_sites[subnet] for subnet in subnets_sites.keys()
-                     if any(ip_address in subnet for ip_address in ip_addresses)), None)
+        return subnet_index(subnets_sites.items()).match(ip_addresses)
 
     def select_site_servers(self):
-        try:
-            ip_addresses = self.get_ip_addresses()
-            subnets_sites = self.get_ad_subnets_sites()
-
-            our_site = self.check_ip_in_subnets(ip_addresses, subnets_sites)
-
-            servers = []
-            if our_site:
-                servers = self.get_ad_site_servers(our_site)
-            random.shuffle(servers)
-            return servers
-        except Exception as e:
-            return []
+        servers = list(self.topology['site_servers'])
+        random.shuffle(servers)
+        return servers
 
     def select_all_servers(self):
-        try:
-            servers = self.get_ad_all_servers()
-            random.shuffle(servers)
-            return servers
-        except Exception as e:
-            return []
+        servers = list(self.topology['all_servers'])
+        random.shuffle(servers)
+        return servers
 
     def select_pdc_emulator_server(self):
         return self.pdc_emulator
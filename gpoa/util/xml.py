@@ -28,3 +28,26 @@ def get_xml_root(xml_file):
 
     return xml_root
 
+
+def iter_xml_items(xml_file):
+    '''
+    Iterate over the second-level elements (preference items) of XML
+    file without loading the whole document into memory. Each element
+    is fully built when yielded and is cleared right after, so it must
+    not be referenced after the next iteration step.
+    '''
+    root = None
+    depth = 0
+    for event, element in ElementTree.iterparse(xml_file, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = element
+            depth += 1
+            continue
+        depth -= 1
+        if depth == 1:
+            yield element
+            element.clear()
+            # Processed items are the only children of root at this point
+            del root[:]
+
@@ -10,10 +10,13 @@
 %add_python3_req_skip gpt.shortcuts
 %add_python3_req_skip gpt.gpo_dconf_mapping
 %add_python3_req_skip gpt.dynamic_attributes
+%add_python3_req_skip gpt.parse_cache
 %add_python3_req_skip messages
 %add_python3_req_skip storage
 %add_python3_req_skip storage.fs_file_cache
 %add_python3_req_skip storage.dconf_registry
+%add_python3_req_skip storage.dconf_db
+%add_python3_req_skip storage.registry_index
 %add_python3_req_skip util
 %add_python3_req_skip util.arguments
 %add_python3_req_skip util.config
@@ -28,6 +31,7 @@
 %add_python3_req_skip util.sid
 %add_python3_req_skip util.signals
 %add_python3_req_skip util.system
+%add_python3_req_skip util.timings
 %add_python3_req_skip util.users
 %add_python3_req_skip util.util
 %add_python3_req_skip util.windows